@@ -0,0 +1,72 @@
+# BenchmarkValidationCheck.py
+# 用合成的 .xlsx 包验证 ExcelValidationCheck 的关系检查随部件数量线性增长
+# 用法:
+#   python BenchmarkValidationCheck.py [part_count ...]
+
+import io
+import sys
+import time
+import zipfile
+
+from ExcelValidationCheck import collect_problems
+
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+SSML_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOC_RELS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+DEFAULT_PART_COUNTS = (1000, 5000, 10000, 20000)
+SHEET_COUNT = 50
+
+
+def build_package(part_count: int) -> io.BytesIO:
+    """
+    生成包含 SHEET_COUNT 张工作表的包，每张表通过自身的 .rels 引用一批 drawing 部件，
+    drawing 总数为 part_count。
+    """
+    buf = io.BytesIO()
+    per_sheet = max(1, part_count // SHEET_COUNT)
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("[Content_Types].xml",
+                   '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        z.writestr("_rels/.rels",
+                   f'<Relationships xmlns="{RELS_NS}">'
+                   f'<Relationship Id="rId1" Type="officeDocument" Target="xl/workbook.xml"/>'
+                   f'</Relationships>')
+        sheets = "".join(f'<sheet name="S{i}" sheetId="{i}" r:id="rId{i}"/>' for i in range(1, SHEET_COUNT + 1))
+        z.writestr("xl/workbook.xml",
+                   f'<workbook xmlns="{SSML_NS}" xmlns:r="{DOC_RELS_NS}"><sheets>{sheets}</sheets></workbook>')
+        wb_rels = "".join(f'<Relationship Id="rId{i}" Type="worksheet" Target="worksheets/sheet{i}.xml"/>'
+                          for i in range(1, SHEET_COUNT + 1))
+        z.writestr("xl/_rels/workbook.xml.rels", f'<Relationships xmlns="{RELS_NS}">{wb_rels}</Relationships>')
+
+        drawing = 0
+        for i in range(1, SHEET_COUNT + 1):
+            z.writestr(f"xl/worksheets/sheet{i}.xml", f'<worksheet xmlns="{SSML_NS}"><sheetData/></worksheet>')
+            rels = []
+            for j in range(per_sheet):
+                rels.append(f'<Relationship Id="rId{j + 1}" Type="drawing" Target="../drawings/drawing{drawing}.xml"/>')
+                z.writestr(f"xl/drawings/drawing{drawing}.xml", "<wsDr/>")
+                drawing += 1
+            z.writestr(f"xl/worksheets/_rels/sheet{i}.xml.rels",
+                       f'<Relationships xmlns="{RELS_NS}">{"".join(rels)}</Relationships>')
+    buf.seek(0)
+    return buf
+
+
+def run(part_counts):
+    print(f"{'parts':>8}{'zip entries':>14}{'seconds':>10}{'us/part':>10}")
+    for count in part_counts:
+        package = build_package(count)
+        with zipfile.ZipFile(package) as zf:
+            entries = len(zf.infolist())
+            start = time.perf_counter()
+            problems = collect_problems(zf)
+            elapsed = time.perf_counter() - start
+        print(f"{count:>8}{entries:>14}{elapsed:>10.3f}{elapsed / count * 1e6:>10.1f}")
+        if problems:
+            print(f"  unexpected problems: {problems[:3]}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_PART_COUNTS
+    run(counts)
@@ -1,32 +1,258 @@
 import zipfile
 import xml.etree.ElementTree as ET
 import sys
+import argparse
+from array import array
 
-def check_xlsx_cell_types(xlsx_path):
+from XlsxCheckCache import make_key, part_fingerprint, add_cache_arguments, open_cache
+
+NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+SHEET_DATA_TAG = NS + "sheetData"
+ROW_TAG = NS + "row"
+CELL_TAG = NS + "c"
+VALUE_TAG = NS + "v"
+INLINE_TAG = NS + "is"
+TEXT_TAG = NS + "t"
+SI_TAG = NS + "si"
+RUN_TAG = NS + "r"
+
+SHARED_STRINGS_PART = "xl/sharedStrings.xml"
+
+# 输出缓冲的行数，避免每个单元格一次 print
+OUTPUT_BUFFER_LINES = 4096
+
+
+def iter_sheet_cells(z, name):
+    """
+    流式遍历工作表中的 <c> 节点，产出 (ref, cell_type, value)。
+    直接从 ZipFile.open 读取，每处理完一行就清理已解析的节点，内存占用与表大小无关。
+    """
+    with z.open(name) as fp:
+        sheet_data = None
+        for event, elem in ET.iterparse(fp, events=("start", "end")):
+            if event == "start":
+                if sheet_data is None and elem.tag == SHEET_DATA_TAG:
+                    sheet_data = elem
+                continue
+
+            if elem.tag == CELL_TAG:
+                value_node = elem.find(VALUE_TAG)
+                if value_node is not None:
+                    value = value_node.text
+                else:
+                    inline_node = elem.find(INLINE_TAG)
+                    value = "".join(inline_node.itertext()) if inline_node is not None else None
+                yield elem.attrib.get("r"), elem.attrib.get("t", "number"), value
+                elem.clear()
+            elif elem.tag == ROW_TAG and sheet_data is not None:
+                # 整行处理完毕，丢弃 sheetData 下已解析的所有行
+                sheet_data.clear()
+
+
+class SharedStrings:
+    """
+    xl/sharedStrings.xml 的紧凑索引，首次访问时才流式构建。
+    所有字符串拼接成一个 str，另用 array 记录偏移，避免百万个小 str 对象的开销。
+    """
+
+    def __init__(self, z):
+        self._z = z
+        self._text = None
+        self._offsets = None
+
+    def _build(self):
+        chunks = []
+        offsets = array("Q", [0])
+        total = 0
+        if SHARED_STRINGS_PART in self._z.NameToInfo:
+            with self._z.open(SHARED_STRINGS_PART) as fp:
+                sst = None
+                for event, elem in ET.iterparse(fp, events=("start", "end")):
+                    if event == "start":
+                        if sst is None:
+                            sst = elem
+                        continue
+                    if elem.tag != SI_TAG:
+                        continue
+                    # 富文本由多个 <r><t> 组成，拼音注释 <rPh> 不计入正文
+                    parts = []
+                    for child in elem:
+                        if child.tag == TEXT_TAG:
+                            parts.append(child.text or "")
+                        elif child.tag == RUN_TAG:
+                            t = child.find(TEXT_TAG)
+                            if t is not None:
+                                parts.append(t.text or "")
+                    text = "".join(parts)
+                    chunks.append(text)
+                    total += len(text)
+                    offsets.append(total)
+                    sst.clear()
+        self._text = "".join(chunks)
+        self._offsets = offsets
+
+    def __len__(self):
+        if self._offsets is None:
+            self._build()
+        return len(self._offsets) - 1
+
+    def get(self, index):
+        if self._offsets is None:
+            self._build()
+        try:
+            i = int(index)
+        except (TypeError, ValueError):
+            return None
+        if i < 0 or i + 1 >= len(self._offsets):
+            return None
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+
+def iter_worksheet_names(z):
+    for name in z.namelist():
+        if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
+            yield name
+
+
+def format_cell(ref, cell_type, value, shared_strings=None):
+    if cell_type in ("str", "inlineStr"):
+        return f"  {ref}: '{value}' (stored as TEXT)"
+    elif cell_type == "b":
+        return f"  {ref}: {value} (stored as BOOLEAN)"
+    elif cell_type == "e":
+        return f"  {ref}: {value} (stored as ERROR)"
+    elif cell_type == "s":
+        if shared_strings is not None:
+            text = shared_strings.get(value)
+            if text is not None:
+                return f"  {ref}: '{text}' (stored as SHARED STRING #{value})"
+        return f"  {ref}: '{value}' (stored as SHARED STRING)"
+    else:
+        return f"  {ref}: {value} (stored as NUMBER)"
+
+
+def classify_cell(cell_type, value):
+    if value is None or value == "":
+        return "EMPTY"
+    if cell_type == "s":
+        return "SHARED"
+    if cell_type in ("str", "inlineStr"):
+        return "TEXT"
+    return "NUMBER"
+
+
+def split_ref(ref):
+    """'AB12' -> ('AB', 12)"""
+    if not ref:
+        return "?", 0
+    i = 0
+    while i < len(ref) and ref[i].isalpha():
+        i += 1
+    return ref[:i], int(ref[i:]) if ref[i:].isdigit() else 0
+
+
+def column_sort_key(column):
+    return len(column), column
+
+
+CELL_KINDS = ("NUMBER", "TEXT", "SHARED", "EMPTY")
+
+
+def summarize_sheet(cells, header_rows=0, max_refs=10):
+    """
+    单次遍历统计每列各类型单元格数量，并为每种类型保留前 max_refs 个单元格位置。
+    返回 {column: {"counts": {...}, "refs": {...}}}，内存只与列数有关。
+    """
+    columns = {}
+    for ref, cell_type, value in cells:
+        column, row = split_ref(ref)
+        if row and row <= header_rows:
+            continue
+        stats = columns.get(column)
+        if stats is None:
+            stats = columns[column] = {
+                "counts": dict.fromkeys(CELL_KINDS, 0),
+                "refs": {kind: [] for kind in CELL_KINDS},
+            }
+        kind = classify_cell(cell_type, value)
+        stats["counts"][kind] += 1
+        refs = stats["refs"][kind]
+        if len(refs) < max_refs:
+            refs.append(ref)
+    return columns
+
+
+def format_summary(columns):
+    lines = [f"  {'Column':<8}{'NUMBER':>10}{'TEXT':>10}{'SHARED':>10}{'EMPTY':>10}  Mismatches"]
+    for column in sorted(columns, key=column_sort_key):
+        counts = columns[column]["counts"]
+        refs = columns[column]["refs"]
+        # 以非空单元格中最多的类型为该列的主类型，其余类型视为不一致
+        filled = [kind for kind in CELL_KINDS[:-1] if counts[kind]]
+        mismatches = []
+        if len(filled) > 1:
+            dominant = max(filled, key=lambda kind: counts[kind])
+            for kind in filled:
+                if kind != dominant:
+                    mismatches.append(f"{kind}: {', '.join(refs[kind])}"
+                                      + (" ..." if counts[kind] > len(refs[kind]) else ""))
+        lines.append(f"  {column:<8}{counts['NUMBER']:>10}{counts['TEXT']:>10}"
+                     f"{counts['SHARED']:>10}{counts['EMPTY']:>10}  {'; '.join(mismatches) or '-'}")
+    return lines
+
+
+def summarize_xlsx_cell_types(xlsx_path, header_rows=0, max_refs=10, out=None, cache=None):
+    out = out or sys.stdout
     with zipfile.ZipFile(xlsx_path, 'r') as z:
+        for name in iter_worksheet_names(z):
+            # 统计结果只取决于工作表本身，按 CRC / 大小缓存，未改动的表不再解压
+            key = make_key("cell_summary", header_rows, max_refs, *part_fingerprint(z.getinfo(name)))
+            columns = cache.get(key) if cache is not None else None
+            if columns is None:
+                columns = summarize_sheet(iter_sheet_cells(z, name), header_rows, max_refs)
+                if cache is not None:
+                    cache.put(key, columns)
+            out.write("\n".join([f"\nSummary of {name}:"] + format_summary(columns)) + "\n")
+    out.flush()
+
+
+def check_xlsx_cell_types(xlsx_path, out=None, resolve_shared=True):
+    out = out or sys.stdout
+    buffer = []
+    with zipfile.ZipFile(xlsx_path, 'r') as z:
+        shared_strings = SharedStrings(z) if resolve_shared else None
         # 遍历所有工作表
-        for name in z.namelist():
-            if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
-                print(f"\nChecking {name}...")
-                xml_data = z.read(name)
-                root = ET.fromstring(xml_data)
-
-                # 遍历 <c> 节点（cell）
-                for c in root.iter("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}c"):
-                    ref = c.attrib.get("r")  # 单元格位置
-                    cell_type = c.attrib.get("t", "number")  # 默认为数字
-                    value_node = c.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v")
-                    value = value_node.text if value_node is not None else None
-
-                    if cell_type == "str":
-                        print(f"  {ref}: '{value}' (stored as TEXT)")
-                    elif cell_type == "s":
-                        print(f"  {ref}: '{value}' (stored as SHARED STRING)")
-                    else:
-                        print(f"  {ref}: {value} (stored as NUMBER)")
+        for name in iter_worksheet_names(z):
+            buffer.append(f"\nChecking {name}...")
+            for ref, cell_type, value in iter_sheet_cells(z, name):
+                buffer.append(format_cell(ref, cell_type, value, shared_strings))
+                if len(buffer) >= OUTPUT_BUFFER_LINES:
+                    out.write("\n".join(buffer) + "\n")
+                    buffer.clear()
+    if buffer:
+        out.write("\n".join(buffer) + "\n")
+    out.flush()
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python check_cell_types.py <file.xlsx>")
+    parser = argparse.ArgumentParser(description="Check how xlsx cells are stored (NUMBER / TEXT / SHARED STRING).")
+    parser.add_argument("xlsx", help="path to the .xlsx file")
+    parser.add_argument("--summary", action="store_true",
+                        help="print per-column type counts instead of one line per cell")
+    parser.add_argument("--header-rows", type=int, default=0,
+                        help="number of leading rows to ignore in --summary mode")
+    parser.add_argument("--max-refs", type=int, default=10,
+                        help="mismatching cell refs listed per column and type in --summary mode")
+    parser.add_argument("--raw-shared", action="store_true",
+                        help="print shared string indexes instead of resolving them")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    if args.summary:
+        cache = open_cache(args)
+        try:
+            summarize_xlsx_cell_types(args.xlsx, args.header_rows, args.max_refs, cache=cache)
+        finally:
+            if cache is not None:
+                cache.close()
     else:
-        check_xlsx_cell_types(sys.argv[1])
+        check_xlsx_cell_types(args.xlsx, resolve_shared=not args.raw_shared)
@@ -0,0 +1,240 @@
+# ExcelBatchCheck.py
+# 批量检查目录 / 通配符下的所有 .xlsx，使用进程池并行，大工作表单独拆分成任务
+# 用法:
+#   python ExcelBatchCheck.py <dir|glob|file> [...] [--jobs N] [--format json|junit] [--output report]
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from XlsxCheckEngine import (CHECKS, STAGE_WORKSHEET, run_checks, run_worksheet_checks, select_checks,
+                             workbook_cache_key, worksheet_cache_key)
+from XlsxCheckCache import MemoryCache, add_cache_arguments, open_cache
+
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+
+# 解压后超过该大小的工作表单独作为一个任务，分给其它进程
+DEFAULT_SPLIT_SIZE = 8 * 1024 * 1024
+
+
+def discover_workbooks(inputs):
+    """展开目录（递归）、通配符和单个文件，去重并保持稳定顺序。"""
+    found = []
+    seen = set()
+
+    def add(path):
+        name = os.path.basename(path)
+        # 跳过 Excel 打开文件时生成的 ~$ 锁文件
+        if name.startswith("~$") or not name.lower().endswith(XLSX_EXTENSIONS):
+            return
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            found.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root_dir, dirs, files in os.walk(item):
+                dirs.sort()
+                for file_name in sorted(files):
+                    add(os.path.join(root_dir, file_name))
+        elif glob.has_magic(item):
+            for path in sorted(glob.glob(item, recursive=True)):
+                if os.path.isfile(path):
+                    add(path)
+        else:
+            add(item)
+    return found
+
+
+def plan_workbook(infos, check_names, split_size):
+    """返回 (留在主任务中遍历的工作表, 需要单独拆分的大工作表)。"""
+    if not any(CHECKS[name].stage == STAGE_WORKSHEET for name in check_names):
+        return None, []
+    sheets = sorted((info.filename, info.file_size) for info in infos
+                    if info.filename.startswith("xl/worksheets/") and info.filename.endswith(".xml"))
+    if len(sheets) < 2:
+        return None, []
+    large = [name for name, size in sheets if size >= split_size]
+    small = [name for name, size in sheets if size < split_size]
+    return small, large
+
+
+def check_workbook_task(path, check_names, sheet_parts, cache):
+    start = time.perf_counter()
+    try:
+        with zipfile.ZipFile(path, "r") as zf:
+            problems = run_checks(zf, check_names, sheet_parts, cache)
+        error = None
+    except (zipfile.BadZipFile, OSError) as e:
+        problems, error = [], f"Failed to open zip: {e}"
+    except Exception as e:
+        # 损坏的压缩流等（如 zlib.error）只记入该文件，不中断整个批次
+        problems, error = [], f"Check failed: {e}"
+    return path, problems, error, time.perf_counter() - start, cache.new_entries
+
+
+def check_sheet_task(path, check_names, sheet_part, cache):
+    start = time.perf_counter()
+    try:
+        with zipfile.ZipFile(path, "r") as zf:
+            problems = run_worksheet_checks(zf, sheet_part, check_names, cache)
+        error = None
+    except (zipfile.BadZipFile, OSError) as e:
+        problems, error = [], f"Failed to open zip: {e}"
+    except Exception as e:
+        # 损坏的压缩流等（如 zlib.error）只记入该文件，不中断整个批次
+        problems, error = [], f"Check failed: {e}"
+    return path, problems, error, time.perf_counter() - start, cache.new_entries
+
+
+def run_batch(paths, check_names=None, jobs=None, split_size=DEFAULT_SPLIT_SIZE, cache=None):
+    """
+    cache 为 ResultCache 时，只在父进程中读写：整个包未改动的文件不提交任务，
+    其余文件把已命中的工作表结果随任务传给工作进程，新结果由父进程写回。
+    """
+    check_names = list(CHECKS) if check_names is None else list(check_names)
+    results = {path: {"path": path, "problems": [], "errors": [], "seconds": 0.0, "cached": False}
+               for path in paths}
+    workbook_keys = {}
+    start = time.perf_counter()
+
+    pending = []
+    for path in paths:
+        try:
+            with zipfile.ZipFile(path, "r") as zf:
+                infos = zf.infolist()
+        except (zipfile.BadZipFile, OSError) as e:
+            results[path]["errors"].append(f"Failed to open zip: {e}")
+            continue
+        prefetched = {}
+        if cache is not None:
+            workbook_keys[path] = workbook_cache_key(infos, check_names)
+            problems = cache.get(workbook_keys[path])
+            if problems is not None:
+                results[path]["problems"] = problems
+                results[path]["cached"] = True
+                continue
+            sheet_keys = [worksheet_cache_key(info, check_names) for info in infos
+                          if info.filename.startswith("xl/worksheets/") and info.filename.endswith(".xml")]
+            prefetched = cache.get_many(sheet_keys)
+        pending.append((path, infos, prefetched))
+
+    futures = []
+    future_paths = {}
+    task_problems = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for path, infos, prefetched in pending:
+                small, large = plan_workbook(infos, check_names, split_size)
+                future = pool.submit(check_workbook_task, path, check_names, small, MemoryCache(prefetched))
+                futures.append(future)
+                future_paths[future] = path
+                for sheet_part in large:
+                    future = pool.submit(check_sheet_task, path, check_names, sheet_part, MemoryCache(prefetched))
+                    futures.append(future)
+                    future_paths[future] = path
+
+            for future in as_completed(futures):
+                path, problems, error, seconds, new_entries = future.result()
+                result = results[path]
+                task_problems[future] = problems
+                if error:
+                    result["errors"].append(error)
+                # 每个文件的耗时为其所有任务耗时之和
+                result["seconds"] += seconds
+                if cache is not None:
+                    cache.put_many(new_entries)
+
+    # 按提交顺序合并问题，报告内容不受任务完成顺序影响
+    for future in futures:
+        results[future_paths[future]]["problems"].extend(task_problems[future])
+
+    if cache is not None:
+        for path, _, _ in pending:
+            if not results[path]["errors"]:
+                cache.put(workbook_keys[path], results[path]["problems"])
+
+    files = [results[path] for path in paths]
+    return {
+        "files": files,
+        "file_count": len(files),
+        "failed_count": sum(1 for f in files if f["problems"] or f["errors"]),
+        "cached_count": sum(1 for f in files if f["cached"]),
+        "wall_seconds": time.perf_counter() - start,
+    }
+
+
+def report_to_junit(report):
+    suite = ET.Element("testsuite", {
+        "name": "ExcelBatchCheck",
+        "tests": str(report["file_count"]),
+        "failures": str(sum(1 for f in report["files"] if f["problems"])),
+        "errors": str(sum(1 for f in report["files"] if f["errors"])),
+        "time": f"{report['wall_seconds']:.3f}",
+    })
+    for f in report["files"]:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": os.path.dirname(f["path"]) or ".",
+            "name": os.path.basename(f["path"]),
+            "time": f"{f['seconds']:.3f}",
+        })
+        if f["errors"]:
+            ET.SubElement(case, "error", {"message": f["errors"][0]}).text = "\n".join(f["errors"])
+        if f["problems"]:
+            ET.SubElement(case, "failure", {
+                "message": f"{len(f['problems'])} issue(s) detected"
+            }).text = "\n".join(f["problems"])
+    return ET.tostring(suite, encoding="unicode")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check many .xlsx workbooks in parallel.")
+    parser.add_argument("inputs", nargs="+", help="directories, glob patterns or .xlsx files")
+    parser.add_argument("--checks", help=f"comma separated subset of: {', '.join(CHECKS)}")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--split-size", type=int, default=DEFAULT_SPLIT_SIZE,
+                        help="uncompressed worksheet size in bytes above which a sheet gets its own task")
+    parser.add_argument("--format", choices=("json", "junit"), default="json")
+    parser.add_argument("--output", help="report file (default: stdout)")
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    check_names = args.checks.split(",") if args.checks else None
+    try:
+        select_checks(check_names)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = discover_workbooks(args.inputs)
+    if not paths:
+        print("No .xlsx files found.", file=sys.stderr)
+        return 1
+
+    cache = open_cache(args)
+    try:
+        report = run_batch(paths, check_names, args.jobs, args.split_size, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    text = json.dumps(report, ensure_ascii=False, indent=2) if args.format == "json" else report_to_junit(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(text)
+    else:
+        print(text)
+
+    print(f"Checked {report['file_count']} files in {report['wall_seconds']:.2f}s "
+          f"({report['cached_count']} unchanged), {report['failed_count']} with issues.", file=sys.stderr)
+    return 1 if report["failed_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# XlsxCheckCache.py
+# 检查结果的磁盘缓存。键由 zip 中央目录里的 CRC32 / 解压大小计算，无需解压任何部件，
+# 未改动的工作表和整个未改动的工作簿都可以直接跳过。
+# 缓存目录默认 ~/.cache/ExcelCheck，可用环境变量 EXCEL_CHECK_CACHE_DIR 覆盖。
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# 检查逻辑或结果格式变化时递增，旧缓存自动失效
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "EXCEL_CHECK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ExcelCheck"))
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def make_key(*parts):
+    data = json.dumps([CACHE_VERSION] + list(parts), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def part_fingerprint(info):
+    """ZipInfo -> (name, CRC32, 解压大小)，只读中央目录。"""
+    return info.filename, info.CRC, info.file_size
+
+
+def package_fingerprint(infos):
+    return sorted(part_fingerprint(info) for info in infos)
+
+
+class ResultCache:
+    """
+    基于 sqlite 的键值缓存，值为 JSON。
+    读取时只记录访问时间，close() 时统一写回并按最近使用时间淘汰，总大小不超过 max_bytes。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(os.path.join(cache_dir, "results.sqlite3"), timeout=30)
+        self._db.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        return json.loads(row[0])
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def put(self, key, value):
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        self._db.execute("INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                         (key, data, len(data), time.time()))
+
+    def put_many(self, entries):
+        for key, value in entries.items():
+            self.put(key, value)
+
+    def evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 淘汰到上限的 90%，避免每次运行都触发淘汰
+        target = total - int(self.max_bytes * 0.9)
+        removed = 0
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY last_used"):
+            doomed.append((key,))
+            removed += size
+            if removed >= target:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self._db.commit()
+        # 淘汰只在超限时发生，顺便归还磁盘空间
+        self._db.execute("VACUUM")
+
+    def close(self):
+        if self._touched:
+            self._db.executemany("UPDATE results SET last_used = ? WHERE key = ?",
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+        self.evict()
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryCache:
+    """
+    传给工作进程的轻量缓存：携带父进程预取的命中结果，新结果记录在 new_entries 中
+    由父进程统一写回 ResultCache，避免多进程并发写 sqlite。
+    """
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.new_entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.new_entries[key] = value
+
+
+def open_cache(args):
+    """根据 --no-cache / --cache-dir / --cache-size 参数打开缓存，禁用时返回 None。"""
+    if args.no_cache:
+        return None
+    return ResultCache(args.cache_dir, args.cache_size)
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result cache")
+    parser.add_argument("--cache-dir", default=None, help="result cache directory (default: ~/.cache/ExcelCheck)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES,
+                        help="maximum cache size in bytes; least recently used entries are evicted")
@@ -0,0 +1,383 @@
+# XlsxCheckEngine.py
+# ExcelDiagnose / ExcelValidationCheck 共用的检查引擎:
+#   - 每个包部件最多解析一次，解析结果在所有检查之间共享
+#   - 先执行廉价的结构检查，再对工作表做一次流式遍历，所有单元格级检查共用这一次遍历
+# 用法:
+#   python XlsxCheckEngine.py <path_to_xlsx> [--checks name1,name2]
+
+import argparse
+import zipfile
+import xml.etree.ElementTree as ET
+import posixpath
+from functools import lru_cache
+
+from XlsxCheckCache import make_key, part_fingerprint, package_fingerprint, add_cache_arguments, open_cache
+
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+SSML_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DOC_RELS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+ROOT_RELS_PART = "_rels/.rels"
+WORKBOOK_PART = "xl/workbook.xml"
+WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+REQUIRED_PARTS = [CONTENT_TYPES_PART, ROOT_RELS_PART, WORKBOOK_PART, WORKBOOK_RELS_PART]
+
+# 检查阶段：结构检查只读少量小部件，工作表检查需要遍历全部单元格
+STAGE_STRUCTURE = 0
+STAGE_WORKSHEET = 1
+
+
+@lru_cache(maxsize=65536)
+def resolve_target(base_part: str, target: str) -> str:
+    # 同一目录下的大量关系指向相同的相对路径，缓存规范化结果
+    if target.startswith("/"):
+        return target.lstrip("/")
+    base_dir = posixpath.dirname(base_part)
+    combined = posixpath.normpath(posixpath.join(base_dir, target))
+    return combined
+
+
+def rels_source_part(rels_part: str) -> str:
+    # xl/worksheets/_rels/sheet1.xml.rels -> xl/worksheets/sheet1.xml
+    rels_dir, rels_name = posixpath.split(rels_part)
+    return posixpath.join(posixpath.dirname(rels_dir), rels_name[:-len(".rels")])
+
+
+def worksheet_rels_part(sheet_part: str) -> str:
+    return posixpath.join(posixpath.dirname(sheet_part), "_rels", posixpath.basename(sheet_part) + ".rels")
+
+
+class XlsxPackage:
+    """
+    对 ZipFile 的只读封装。部件名集合只构建一次，XML 部件按需解析并缓存，
+    解析错误只记录一次。
+    """
+
+    def __init__(self, zf: zipfile.ZipFile):
+        self.zf = zf
+        self.names = set(zf.namelist())
+        self.parse_errors = []
+        self._xml = {}
+        self._rels = {}
+
+    def xml(self, name: str):
+        """返回解析后的根节点；部件不存在或解析失败时返回 None。"""
+        if name in self._xml:
+            return self._xml[name]
+        root = None
+        if name in self.names:
+            try:
+                with self.zf.open(name) as fp:
+                    root = ET.fromstring(fp.read())
+            except ET.ParseError as e:
+                self.parse_errors.append(f"XML parse error in {name}: {e}")
+        self._xml[name] = root
+        return root
+
+    def relationships(self, rels_part: str):
+        """
+        返回 (mapping, problems)。mapping 为 {rId: (Type, Target, TargetMode)}，
+        problems 为该 .rels 部件自身的格式问题。
+        """
+        if rels_part in self._rels:
+            return self._rels[rels_part]
+        mapping = {}
+        problems = []
+        xml = self.xml(rels_part)
+        if xml is not None:
+            for rel in xml.findall(f"{{{RELS_NS}}}Relationship"):
+                rid = rel.get("Id")
+                target = rel.get("Target")
+                if not rid or not target:
+                    problems.append(f"{rels_part}: Relationship missing Id/Target")
+                    continue
+                mapping[rid] = (rel.get("Type"), target, rel.get("TargetMode", "Internal"))
+        self._rels[rels_part] = (mapping, problems)
+        return mapping, problems
+
+    def worksheet_parts(self):
+        return sorted(name for name in self.names
+                      if name.startswith("xl/worksheets/") and name.endswith(".xml"))
+
+
+class Check:
+    """结构检查：run() 中通过 package 读取共享的解析结果，问题追加到 problems。"""
+    name = ""
+    stage = STAGE_STRUCTURE
+
+    def run(self, package: XlsxPackage, problems: list):
+        raise NotImplementedError
+
+
+class WorksheetCheck(Check):
+    """单元格级检查：由引擎在唯一一次流式遍历中逐个回调 visit_cell。"""
+    stage = STAGE_WORKSHEET
+
+    def start_sheet(self, sheet_part: str, problems: list):
+        pass
+
+    def visit_cell(self, sheet_part: str, cell, problems: list):
+        pass
+
+    def end_sheet(self, sheet_part: str, problems: list):
+        pass
+
+
+CHECKS = {}
+
+
+def register_check(cls):
+    CHECKS[cls.name] = cls
+    return cls
+
+
+def check_relationships(package: XlsxPackage, rels_part: str, problems: list):
+    if rels_part not in package.names:
+        problems.append(f"Missing relationships part: {rels_part}")
+        return {}
+    if package.xml(rels_part) is None:
+        return {}
+    mapping, rels_problems = package.relationships(rels_part)
+    problems.extend(rels_problems)
+    source_part = rels_source_part(rels_part)
+    for rid, (rtype, target, mode) in mapping.items():
+        if mode == "External":
+            continue
+        resolved = resolve_target(source_part, target)
+        if resolved not in package.names:
+            problems.append(f"{rels_part}: Relationship {rid} -> missing part '{resolved}' (Type={rtype})")
+    return mapping
+
+
+@register_check
+class RequiredPartsCheck(Check):
+    name = "required_parts"
+
+    def run(self, package, problems):
+        for req in REQUIRED_PARTS:
+            if req not in package.names:
+                problems.append(f"Missing required part: {req}")
+
+
+@register_check
+class PackageRelationshipsCheck(Check):
+    name = "package_rels"
+
+    def run(self, package, problems):
+        if ROOT_RELS_PART in package.names:
+            check_relationships(package, ROOT_RELS_PART, problems)
+
+
+@register_check
+class WorkbookRelationshipsCheck(Check):
+    name = "workbook_rels"
+
+    def run(self, package, problems):
+        if WORKBOOK_RELS_PART in package.names:
+            check_relationships(package, WORKBOOK_RELS_PART, problems)
+
+
+@register_check
+class WorkbookSheetsCheck(Check):
+    name = "workbook_sheets"
+
+    def run(self, package, problems):
+        wb = package.xml(WORKBOOK_PART)
+        if wb is None:
+            return
+        wb_rels_map, _ = package.relationships(WORKBOOK_RELS_PART)
+        sheets = wb.find(f"{{{SSML_NS}}}sheets")
+        if sheets is None:
+            problems.append("workbook.xml: Missing <sheets> element")
+            return
+        for sheet in sheets.findall(f"{{{SSML_NS}}}sheet"):
+            rid = sheet.get(f"{{{DOC_RELS_NS}}}id")
+            name = sheet.get("name", "?")
+            if rid not in wb_rels_map:
+                problems.append(f"workbook.xml: sheet '{name}' references unknown relationship '{rid}'")
+                continue
+            _, target, mode = wb_rels_map[rid]
+            if mode != "Internal":
+                problems.append(f"workbook.xml: sheet '{name}' relationship '{rid}' is External (unexpected)")
+            else:
+                resolved = resolve_target(WORKBOOK_PART, target)
+                if resolved not in package.names:
+                    problems.append(f"workbook.xml: sheet '{name}' target part missing: '{resolved}'")
+
+
+@register_check
+class ContentTypesCheck(Check):
+    name = "content_types"
+
+    def run(self, package, problems):
+        ct = package.xml(CONTENT_TYPES_PART)
+        if ct is None:
+            return
+        for ov in ct.findall(f"{{{CT_NS}}}Override"):
+            part_name = ov.get("PartName", "").lstrip("/")
+            if part_name and part_name not in package.names:
+                problems.append(f"[Content_Types].xml: Override references missing part '{part_name}'")
+
+
+@register_check
+class WorksheetRelationshipsCheck(Check):
+    name = "worksheet_rels"
+
+    def run(self, package, problems):
+        for name in package.worksheet_parts():
+            rels_name = worksheet_rels_part(name)
+            if rels_name in package.names:
+                check_relationships(package, rels_name, problems)
+
+
+@register_check
+class EmptyFormulaCheck(WorksheetCheck):
+    name = "empty_formulas"
+    formula_tag = f"{{{SSML_NS}}}f"
+
+    def visit_cell(self, sheet_part, cell, problems):
+        f = cell.find(self.formula_tag)
+        if f is None or (f.text or "").strip():
+            return
+        # 共享公式的从属单元格只带 si 属性，公式文本在主单元格上，不算空公式
+        if f.get("t") == "shared" and f.get("si") is not None:
+            return
+        problems.append(f"{sheet_part}: empty formula tag at cell {cell.get('r', '?')}")
+
+
+def stream_worksheet(package: XlsxPackage, sheet_part: str, checks, problems: list):
+    cell_tag = f"{{{SSML_NS}}}c"
+    row_tag = f"{{{SSML_NS}}}row"
+    sheet_data_tag = f"{{{SSML_NS}}}sheetData"
+    for check in checks:
+        check.start_sheet(sheet_part, problems)
+    try:
+        with package.zf.open(sheet_part) as fp:
+            sheet_data = None
+            for event, elem in ET.iterparse(fp, events=("start", "end")):
+                if event == "start":
+                    if sheet_data is None and elem.tag == sheet_data_tag:
+                        sheet_data = elem
+                    continue
+                if elem.tag == cell_tag:
+                    for check in checks:
+                        check.visit_cell(sheet_part, elem, problems)
+                elif elem.tag == row_tag and sheet_data is not None:
+                    sheet_data.clear()
+    except ET.ParseError as e:
+        problems.append(f"XML parse error in {sheet_part}: {e}")
+    for check in checks:
+        check.end_sheet(sheet_part, problems)
+
+
+def resolve_check_names(check_names=None):
+    return list(CHECKS) if check_names is None else list(check_names)
+
+
+def select_checks(check_names=None):
+    names = resolve_check_names(check_names)
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        raise ValueError(f"Unknown checks: {', '.join(unknown)}")
+    return sorted((CHECKS[name]() for name in names), key=lambda check: check.stage)
+
+
+def worksheet_cache_key(info: zipfile.ZipInfo, check_names=None):
+    # 工作表检查的结果只取决于该部件本身的内容
+    names = [name for name in resolve_check_names(check_names) if CHECKS[name].stage == STAGE_WORKSHEET]
+    return make_key("worksheet", names, *part_fingerprint(info))
+
+
+def workbook_cache_key(infos, check_names=None):
+    return make_key("workbook", resolve_check_names(check_names), package_fingerprint(infos))
+
+
+def run_checks(zf: zipfile.ZipFile, check_names=None, sheet_parts=None, cache=None):
+    """
+    对已打开的 zip 执行指定检查（默认全部），返回问题列表。
+    结构检查按注册顺序先执行，工作表检查合并为一次流式遍历。
+    sheet_parts 可限定需要遍历的工作表（默认全部），用于把大工作表拆给其它进程。
+    cache 提供 get/put 时，未改动的工作表直接复用上次的结果，不再解压。
+    """
+    checks = select_checks(check_names)
+    package = XlsxPackage(zf)
+    problems = []
+    for check in checks:
+        if check.stage == STAGE_STRUCTURE:
+            check.run(package, problems)
+
+    worksheet_checks = [check for check in checks if check.stage == STAGE_WORKSHEET]
+    if worksheet_checks:
+        if sheet_parts is None:
+            sheet_parts = package.worksheet_parts()
+        for sheet_part in sheet_parts:
+            problems.extend(check_worksheet_cached(package, sheet_part, worksheet_checks, check_names, cache))
+
+    return package.parse_errors + problems
+
+
+def check_worksheet_cached(package: XlsxPackage, sheet_part: str, checks, check_names, cache):
+    key = None
+    if cache is not None:
+        key = worksheet_cache_key(package.zf.getinfo(sheet_part), check_names)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    problems = []
+    stream_worksheet(package, sheet_part, checks, problems)
+    if cache is not None:
+        cache.put(key, problems)
+    return problems
+
+
+def run_worksheet_checks(zf: zipfile.ZipFile, sheet_part: str, check_names=None, cache=None):
+    """只对单个工作表执行单元格级检查。"""
+    checks = [check for check in select_checks(check_names) if check.stage == STAGE_WORKSHEET]
+    if not checks:
+        return []
+    return check_worksheet_cached(XlsxPackage(zf), sheet_part, checks, check_names, cache)
+
+
+def check_file(path, check_names=None, cache=None):
+    """
+    检查单个文件。提供 cache 时先按整个包的 CRC 指纹查找，工作簿未改动则完全跳过，
+    否则只重新遍历改动过的工作表。
+    """
+    with zipfile.ZipFile(path, "r") as zf:
+        if cache is None:
+            return run_checks(zf, check_names)
+        key = workbook_cache_key(zf.infolist(), check_names)
+        problems = cache.get(key)
+        if problems is None:
+            problems = run_checks(zf, check_names, cache=cache)
+            cache.put(key, problems)
+        return problems
+
+
+def main(path, check_names=None, cache=None):
+    try:
+        problems = check_file(path, check_names, cache)
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"Failed to open zip: {e}")
+        return
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if not problems:
+        print("No issues detected. The .xlsx looks structurally sound.")
+    else:
+        print("Potential issues detected:")
+        for p in problems:
+            print(" - " + p)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run all xlsx package and worksheet checks in a single pass.")
+    parser.add_argument("xlsx", help="path to the .xlsx file")
+    parser.add_argument("--checks", help=f"comma separated subset of: {', '.join(CHECKS)}")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    main(args.xlsx, args.checks.split(",") if args.checks else None, open_cache(args))
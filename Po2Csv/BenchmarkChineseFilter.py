@@ -0,0 +1,99 @@
+# BenchmarkChineseFilter.py
+# 用合成的 PO 语料（默认 100 万条，约 30% 含中文，部分为扩展区字符）测量 --only-chinese 过滤的开销：
+# 单独比较旧的逐字符循环与预编译字符类，再完整运行 po_to_csv_streaming（解析 + 过滤 + 写 CSV），
+# 得出过滤判断在整个过滤导出中所占的比例。
+# 用法:
+#   python BenchmarkChineseFilter.py [--entries N]
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import Po2Csv
+from Po2Csv import contains_chinese, po_to_csv_streaming
+
+DEFAULT_ENTRY_COUNT = 1_000_000
+
+
+def contains_chinese_legacy(text):
+    # 旧实现：逐字符比较，只覆盖基本区
+    return any('\u4e00' <= ch <= '\u9fff' for ch in text)
+
+
+def make_corpus(count, seed=0):
+    """约 30% 条目含中文（其中部分为扩展区字符），其余为英文，长度接近真实 UI 文本"""
+    rng = random.Random(seed)
+    english = "Start Game Options Settings Quit Inventory Quest Reward Level Up Confirm Cancel".split()
+    chinese = "开始游戏设置选项退出背包任务奖励升级确认取消"
+    rare = "㐀㑇䶵𠀀𪜀𫝀"
+    corpus = []
+    for i in range(count):
+        words = " ".join(rng.choice(english) for _ in range(rng.randint(2, 12)))
+        roll = rng.random()
+        if roll < 0.25:
+            text = words + " " + "".join(rng.choice(chinese) for _ in range(rng.randint(2, 10)))
+        elif roll < 0.3:
+            text = words + rng.choice(rare)
+        else:
+            text = words
+        corpus.append(("Key:\t%08X" % i, "NS,%08X" % i, text))
+    return corpus
+
+
+def write_po(path, corpus):
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n\n')
+        for comment, msgctxt, msgid in corpus:
+            fp.write(f'#. {comment}\nmsgctxt "{msgctxt}"\nmsgid "{msgid}"\nmsgstr ""\n\n')
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36}{elapsed:>8.3f}s")
+    return result, elapsed
+
+
+def run(count):
+    corpus = make_corpus(count)
+    msgids = [entry[2] for entry in corpus]
+
+    print(f"{count} entries, filter only:")
+    legacy, legacy_time = timed("legacy per-char loop", lambda: sum(1 for t in msgids if contains_chinese_legacy(t)))
+    current, filter_time = timed("precompiled CJK class", lambda: sum(1 for t in msgids if contains_chinese(t)))
+    print(f"  matches: legacy {legacy}, full CJK ranges {current}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        po_path = os.path.join(tmp, "Game.po")
+        write_po(po_path, corpus)
+        print(f"po_to_csv_streaming end to end ({os.path.getsize(po_path) / 1024 / 1024:.1f} MB):")
+        timed("no filter", lambda: po_to_csv_streaming(po_path, False))
+        _, filtered = timed("--only-chinese", lambda: po_to_csv_streaming(po_path, True))
+
+        # 换成旧的逐字符判断再跑一次，作为对照
+        saved = Po2Csv._cjk_search
+        Po2Csv._cjk_search = contains_chinese_legacy
+        try:
+            _, legacy_filtered = timed("--only-chinese (legacy filter)", lambda: po_to_csv_streaming(po_path, True))
+        finally:
+            Po2Csv._cjk_search = saved
+
+    print(f"  filter share of filtered export: {filter_time / filtered:.0%}"
+          f" (legacy {legacy_time / legacy_filtered:.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cost of the Po2Csv --only-chinese filter.")
+    parser.add_argument("--entries", type=int, default=DEFAULT_ENTRY_COUNT,
+                        help="entries in the synthetic corpus (default: %(default)s)")
+    args = parser.parse_args(argv)
+    run(args.entries)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,102 @@
 import csv
 import polib
 import os
-import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog
+import re
+import sys
+import glob
+import mmap
+import struct
+import hashlib
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+PO_ESCAPE_REGEX = re.compile(r'\\(.)')
+PO_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+# CJK 统一表意文字全范围：基本区、扩展 A、扩展 B~I（含兼容补充区 2F800 起），兼容表意文字，以及 〇
+CJK_REGEX = re.compile('[\u3007\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U000323af]')
+_cjk_search = CJK_REGEX.search
+
+# iter_po_entries 产出的字段下标
+ENTRY_FIELDS = {'comment': 0, 'msgctxt': 1, 'msgid': 2, 'msgstr': 3}
+DEFAULT_CHINESE_FIELDS = ('msgid',)
 
 def contains_chinese(text):
-    return any('\u4e00' <= ch <= '\u9fff' for ch in text)
+    return _cjk_search(text) is not None if text else False
 
-def po_to_csv(po_file_path, only_chinese=False):
-    po = polib.pofile(po_file_path)
+def unescape(text):
+    # 与 polib 一致，只处理 \\ \n \t \r \"
+    if '\\' not in text:
+        return text
+    return PO_ESCAPE_REGEX.sub(lambda m: PO_ESCAPES.get(m.group(1), m.group(0)), text)
+
+def iter_po_entries(file):
+    """
+    轻量的流式 PO 读取器，逐条产出 (comment, msgctxt, msgid, msgstr)，不构建 polib 的对象图。
+    comment 为 "#." 提取注释；跳过 msgid 为空的文件头；复数条目的 msgstr 为空（同 polib）；
+    与 polib 一样包含 "#~" 废弃条目。
+    """
+    comments = []
+    fields = {}
+    current = None
+
+    def flush():
+        msgid = fields.get('msgid')
+        if msgid is not None and (msgid or 'msgctxt' in fields):
+            return ('\n'.join(comments), fields.get('msgctxt', ''), msgid,
+                    fields.get('msgstr', ''))
+        return None
+
+    for line in file:
+        line = line.strip()
+        if line.startswith('#~'):
+            line = line[2:].lstrip()
+            if not line:
+                continue
+        if not line:
+            continue
+
+        if line[0] == '"':
+            if current is not None:
+                fields[current] += unescape(line[1:-1])
+            continue
+
+        if line[0] == '#':
+            # 注释出现在 msg* 之后，说明上一条已经结束
+            if fields:
+                entry = flush()
+                if entry is not None:
+                    yield entry
+                comments, fields, current = [], {}, None
+            if line.startswith('#.'):
+                comments.append(line[3:] if line[2:3] == ' ' else line[2:])
+            continue
+
+        keyword, _, value = line.partition(' ')
+        if keyword == 'msgctxt' or (keyword == 'msgid' and 'msgid' in fields):
+            # 新条目开始
+            if 'msgid' in fields:
+                entry = flush()
+                if entry is not None:
+                    yield entry
+                comments, fields = [], {}
+        current = keyword
+        fields[keyword] = unescape(value.strip()[1:-1])
 
+    if fields:
+        entry = flush()
+        if entry is not None:
+            yield entry
+
+def csv_path_for(po_file_path):
     # 输出 CSV 文件路径：同目录，同名改扩展
     base_name = os.path.splitext(os.path.basename(po_file_path))[0]
-    csv_file_path = os.path.join(os.path.dirname(po_file_path), f"{base_name}.csv")
+    return os.path.join(os.path.dirname(po_file_path), f"{base_name}.csv")
+
+def po_to_csv(po_file_path, only_chinese=False, chinese_fields=DEFAULT_CHINESE_FIELDS):
+    po = polib.pofile(po_file_path)
+    csv_file_path = csv_path_for(po_file_path)
 
     with open(csv_file_path, mode='w', newline='', encoding='utf-8-sig') as csv_file:
         csv_writer = csv.writer(csv_file)
@@ -23,14 +107,190 @@ def po_to_csv(po_file_path, only_chinese=False):
             msgctxt = entry.msgctxt or ''
             comment = entry.comment or ''
 
-            if only_chinese and not contains_chinese(msgid):
+            if only_chinese and not any(contains_chinese(getattr(entry, field) or '') for field in chinese_fields):
                 continue
 
             csv_writer.writerow([comment, msgctxt, msgid])
 
     return csv_file_path
 
+def po_to_csv_streaming(po_file_path, only_chinese=False, chinese_fields=DEFAULT_CHINESE_FIELDS):
+    """无界面模式使用的流式版本，逐条写出，内存占用与条目数无关。返回 (csv 路径, 写出条数)"""
+    csv_file_path = csv_path_for(po_file_path)
+    indexes = [ENTRY_FIELDS[field] for field in chinese_fields]
+    count = 0
+    with open(po_file_path, encoding='utf-8-sig') as po_file, \
+            open(csv_file_path, mode='w', newline='', encoding='utf-8-sig') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(['comment', 'msgctxt', 'msgid'])
+        for entry in iter_po_entries(po_file):
+            if only_chinese and not any(_cjk_search(entry[i]) for i in indexes):
+                continue
+            csv_writer.writerow(entry[:3])
+            count += 1
+    return csv_file_path, count
+
+# 增量导出索引：魔数 + 条目数，随后依次为键哈希、内容哈希、文本偏移（均为 uint64 数组）和 utf-8 文本区
+INDEX_MAGIC = b"PO2CSVI1"
+INDEX_HEADER = struct.Struct("<8sQ")
+INDEX_SEPARATOR = "\x00"
+
+def hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def entry_hashes(comment, msgctxt, msgid):
+    # UE 的 msgctxt 为 "Namespace,Key"，唯一标识一条文本；没有 msgctxt 时退回 msgid
+    key = hash64(msgctxt) if msgctxt else hash64(INDEX_SEPARATOR + msgid)
+    return key, hash64(comment + INDEX_SEPARATOR + msgid)
+
+def index_path_for(po_file_path):
+    return os.path.splitext(csv_path_for(po_file_path))[0] + ".poidx"
+
+class ExportIndex:
+    """
+    上一次导出的紧凑索引。哈希数组和文本块从内存映射中一次性复制出来；
+    文本只在需要输出 removed 条目时按偏移切片解码。
+    """
+
+    def __init__(self, keys=None, values=None, offsets=None, blob=b""):
+        self.keys = keys if keys is not None else array('Q')
+        self.values = values if values is not None else array('Q')
+        self.offsets = offsets if offsets is not None else array('Q', [0])
+        self.blob = blob
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        # 数组和文本都复制出来后立即关闭映射，之后才能用 os.replace 覆盖索引文件（Windows 下被映射的文件无法替换）
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, count = INDEX_HEADER.unpack_from(data, 0)
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"{path} 不是有效的索引文件")
+            pos = INDEX_HEADER.size
+            arrays = []
+            for length in (count, count, count + 1):
+                arr = array('Q')
+                arr.frombytes(data[pos:pos + length * 8])
+                arrays.append(arr)
+                pos += length * 8
+            blob = data[pos:]
+        return cls(*arrays, blob=blob)
+
+    def lookup(self):
+        return dict(zip(self.keys, self.values))
+
+    def text(self, i):
+        comment, msgctxt, msgid = self.blob[self.offsets[i]:self.offsets[i + 1]].decode('utf-8').split(INDEX_SEPARATOR, 2)
+        return comment, msgctxt, msgid
+
+    def save(self, path, parts):
+        """parts 为与 keys 顺序一致的 utf-8 文本片段列表"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(self.keys)))
+            f.write(self.keys.tobytes())
+            f.write(self.values.tobytes())
+            f.write(self.offsets.tobytes())
+            for part in parts:
+                f.write(part)
+        os.replace(tmp_path, path)
+
+def po_to_csv_incremental(po_file_path, only_chinese=False, chinese_fields=DEFAULT_CHINESE_FIELDS, index_path=None):
+    """
+    与上次导出比较，只把新增(new)、修改(changed)、删除(removed)的条目写入 <名称>.delta.csv，
+    并更新索引。返回 (delta csv 路径, {'new': n, 'changed': n, 'removed': n, 'unchanged': n})。
+    """
+    index_path = index_path or index_path_for(po_file_path)
+    delta_path = os.path.splitext(csv_path_for(po_file_path))[0] + ".delta.csv"
+    indexes = [ENTRY_FIELDS[field] for field in chinese_fields]
+
+    previous = ExportIndex.load(index_path)
+    previous_lookup = previous.lookup()
+    current = ExportIndex()
+    parts = []
+    seen = set()
+    counts = {'new': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+
+    with open(po_file_path, encoding='utf-8-sig') as po_file, \
+            open(delta_path, mode='w', newline='', encoding='utf-8-sig') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(['change', 'comment', 'msgctxt', 'msgid'])
+
+        for entry in iter_po_entries(po_file):
+            if only_chinese and not any(_cjk_search(entry[i]) for i in indexes):
+                continue
+            comment, msgctxt, msgid = entry[:3]
+            key, value = entry_hashes(comment, msgctxt, msgid)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            old_value = previous_lookup.get(key)
+            if old_value is None:
+                change = 'new'
+            elif old_value != value:
+                change = 'changed'
+            else:
+                change = 'unchanged'
+            counts[change] += 1
+            if change != 'unchanged':
+                csv_writer.writerow([change, comment, msgctxt, msgid])
+
+            part = INDEX_SEPARATOR.join((comment, msgctxt, msgid)).encode('utf-8')
+            current.keys.append(key)
+            current.values.append(value)
+            current.offsets.append(current.offsets[-1] + len(part))
+            parts.append(part)
+
+        for i, key in enumerate(previous.keys):
+            if key not in seen:
+                counts['removed'] += 1
+                csv_writer.writerow(['removed', *previous.text(i)])
+
+    current.save(index_path, parts)
+    return delta_path, counts
+
+def find_po_files(inputs):
+    """展开目录（递归查找 *.po）和通配符，例如 Localization/Game/*/*.po"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found.extend(sorted(glob.glob(os.path.join(item, '**', '*.po'), recursive=True)))
+        elif glob.has_magic(item):
+            found.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            found.append(item)
+    return list(dict.fromkeys(found))
+
+def batch_po_to_csv(inputs, only_chinese=False, jobs=None, chinese_fields=DEFAULT_CHINESE_FIELDS, incremental=False):
+    po_files = find_po_files(inputs)
+    if not po_files:
+        print("未找到 PO 文件")
+        return 1
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        convert = po_to_csv_incremental if incremental else po_to_csv_streaming
+        futures = {pool.submit(convert, path, only_chinese, chinese_fields): path for path in po_files}
+        for future in as_completed(futures):
+            try:
+                csv_file_path, count = future.result()
+                if incremental:
+                    count = "，".join(f"{key} {value}" for key, value in count.items())
+                else:
+                    count = f"{count} 条"
+                print(f"{futures[future]} -> {csv_file_path} ({count})")
+            except Exception as e:
+                failed += 1
+                print(f"{futures[future]} 转换失败: {e}", file=sys.stderr)
+    print(f"完成: {len(po_files) - failed} / {len(po_files)}")
+    return 1 if failed else 0
+
 def main():
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
     root = tk.Tk()
     root.withdraw()  # 隐藏主窗口
 
@@ -49,4 +309,19 @@ def main():
     messagebox.showinfo("完成", f"CSV 已输出到:\n{csv_file_path}")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        parser = argparse.ArgumentParser(description="Convert .po files to CSV without the GUI.")
+        parser.add_argument("inputs", nargs="*", help="PO files, directories or globs (e.g. Localization/Game/*/*.po)")
+        parser.add_argument("--only-chinese", action="store_true", help="keep only entries containing Chinese")
+        parser.add_argument("--chinese-fields", default=",".join(DEFAULT_CHINESE_FIELDS),
+                            help=f"fields checked by --only-chinese, any of {','.join(ENTRY_FIELDS)} (default: msgid)")
+        parser.add_argument("--incremental", action="store_true",
+                            help="write only new/changed/removed entries since the last export to <name>.delta.csv")
+        parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+        args = parser.parse_args()
+        chinese_fields = tuple(args.chinese_fields.split(","))
+        unknown = [field for field in chinese_fields if field not in ENTRY_FIELDS]
+        if unknown or not args.inputs:
+            parser.error(f"unknown fields: {', '.join(unknown)}" if unknown else "no input files")
+        sys.exit(batch_po_to_csv(args.inputs, args.only_chinese, args.jobs, chinese_fields, args.incremental))
     main()
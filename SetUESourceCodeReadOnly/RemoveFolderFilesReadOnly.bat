@@ -1,3 +0,0 @@
-@echo off
-set "target_folder=F:\SourceEngine"
-attrib -r "%target_folder%\*.*" /s /d
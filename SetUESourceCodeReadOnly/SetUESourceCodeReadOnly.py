@@ -1,9 +1,14 @@
 import os
-import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog
+import sys
+import time
+import argparse
 import threading
 import stat
 import ctypes
+import json
+import zlib
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # 默认设置
 DEFAULT_EXCLUDED_DIRS = {
@@ -19,57 +24,393 @@ EXCLUDED_DIRS = DEFAULT_EXCLUDED_DIRS.copy()
 EXTENSIONS = DEFAULT_EXTENSIONS.copy()
 
 
-def set_files_readonly(directory_path, selected_extensions, text_output, start_button):
-    modified_files = []
-    file_count = 0
-
+# Windows 只读属性 FILE_ATTRIBUTE_READONLY
+FILE_ATTRIBUTE_READONLY = 0x1
+# 非 Windows 平台设置的目标权限
+READONLY_MODE = stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)
+
+# 界面刷新间隔（每秒最多 10 次）和界面中显示的错误条数
+PROGRESS_INTERVAL_MS = 100
+MAX_REPORTED_ERRORS = 20
+
+# 上次运行的记录（目录 mtime、子目录、文件 mtime 和原始属性），用于增量处理和撤销
+# 默认目录 ~/.cache/SetUESourceCodeReadOnly，可用环境变量 UE_READONLY_MANIFEST_DIR 覆盖
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_DIR = os.environ.get(
+    "UE_READONLY_MANIFEST_DIR", os.path.join(os.path.expanduser("~"), ".cache", "SetUESourceCodeReadOnly"))
+
+
+def file_extension(file_name):
+    """与 os.path.splitext(...)[1].lower() 相同，但不做路径拆分"""
+    index = file_name.rfind('.')
+    if index <= 0 or file_name[:index].strip('.') == '':
+        return ''
+    return file_name[index:].lower()
+
+
+def make_file_readonly(entry):
+    """
+    使用 DirEntry 已缓存的 stat 信息（Windows 上来自目录枚举，无需额外系统调用），
+    已经是只读的文件直接跳过。返回 (mtime_ns, 修改前的属性)，原本就只读时属性为 None。
+    """
+    return make_path_readonly(entry.path, entry.stat())
+
+
+def make_path_readonly(file_path, st):
+    """按给定的 stat 结果设置只读，已经是只读时不写入；返回值同 make_file_readonly"""
+    if os.name == 'nt':
+        file_attributes = st.st_file_attributes
+        if file_attributes & FILE_ATTRIBUTE_READONLY:
+            return st.st_mtime_ns, None
+        if not ctypes.windll.kernel32.SetFileAttributesW(file_path, file_attributes | FILE_ATTRIBUTE_READONLY):
+            raise ctypes.WinError()
+        return st.st_mtime_ns, file_attributes
+
+    mode = stat.S_IMODE(st.st_mode)
+    if mode == READONLY_MODE:
+        return st.st_mtime_ns, None
+    os.chmod(file_path, READONLY_MODE)
+    return st.st_mtime_ns, mode
+
+
+def make_file_writable(file_path, original):
+    """恢复修改前的属性；原本就只读（original 为 None）的文件只去掉只读位"""
+    if os.name == 'nt':
+        if original is None:
+            os.chmod(file_path, stat.S_IREAD | stat.S_IWRITE)
+        elif not ctypes.windll.kernel32.SetFileAttributesW(file_path, original):
+            raise ctypes.WinError()
+    else:
+        os.chmod(file_path, READONLY_MODE | stat.S_IWUSR if original is None else original)
+
+
+def scan_directory(directory_path, relative_path, dir_mtime, selected_extensions, excluded_dirs, previous):
+    """
+    处理单个目录。previous 为上次记录的 [mtime_ns, 子目录名, 文件列表]，
+    目录 mtime 未变（没有新增、删除或替换文件）时不再列目录，只逐个 stat 记录中的文件：
+    只改属性不会更新目录 mtime，被改回可写的文件仍要重新设为只读。
+    返回 (子目录任务列表, 修改数, 跳过数, 错误列表, 本次记录)。
+    """
+    errors = []
     try:
-        # 禁用开始按钮
-        root.after(0, lambda: start_button.config(state=tk.DISABLED))
-
-        # 清空文本框
-        root.after(0, lambda: text_output.config(state=tk.NORMAL))
-        root.after(0, lambda: text_output.delete(1.0, tk.END))
-        root.after(0, lambda: text_output.config(state=tk.DISABLED))
-
-        for root_dir, dirs, files in os.walk(directory_path):
-            # 排除不需要设置为只读的目录
-            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-            for file_name in files:
-                file_path = os.path.join(root_dir, file_name)
-                file_extension = os.path.splitext(file_path)[1].lower()
-
-                # 检查文件后缀是否在允许的列表中
-                if file_extension in selected_extensions:
-                    try:
-                        # Windows平台特定的设置只读属性
-                        if os.name == 'nt':
-                            # 获取当前文件属性
-                            file_attributes = ctypes.windll.kernel32.GetFileAttributesW(file_path)
-                            # 设置只读属性 (FILE_ATTRIBUTE_READONLY = 0x1)
-                            ctypes.windll.kernel32.SetFileAttributesW(file_path, file_attributes | 0x1)
-                        else:
-                            # 非Windows平台使用chmod
-                            os.chmod(file_path, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
-
-                        modified_files.append(file_path)
-                        file_count += 1
-
-                        # 每处理10个文件更新一次UI
-                        if file_count % 10 == 0:
-                            # 使用after方法在主线程中更新UI
-                            root.after(0, update_ui, text_output, f"已处理{file_count}个文件...\n")
-
-                    except Exception as e:
-                        error_msg = f"设置{file_path}为只读时出错: {e}"
-                        print(error_msg)
-                        root.after(0, update_ui, text_output, error_msg + "\n")
-
+        if dir_mtime is None:
+            dir_mtime = os.stat(directory_path).st_mtime_ns
+    except OSError as e:
+        return [], 0, 0, [f"读取目录{directory_path}时出错: {e}"], None
+
+    if previous is not None and previous[0] == dir_mtime:
+        subdirs = [(os.path.join(directory_path, name), os.path.join(relative_path, name), None)
+                   for name in previous[1]]
+        files = []
+        changed = skipped = 0
+        for name, old_mtime, old_original in previous[2]:
+            file_path = os.path.join(directory_path, name)
+            try:
+                mtime, original = make_path_readonly(file_path, os.stat(file_path))
+            except OSError as e:
+                errors.append(f"设置{file_path}为只读时出错: {e}")
+                continue
+            if original is None:
+                skipped += 1
+                if old_mtime == mtime:
+                    original = old_original
+            else:
+                changed += 1
+            files.append((name, mtime, original))
+        record = None if errors else [dir_mtime, previous[1], files]
+        return subdirs, changed, skipped, errors, record
+
+    previous_files = {name: (mtime, original) for name, mtime, original in previous[2]} if previous else {}
+    subdirs = []
+    subdir_names = []
+    files = []
+    changed = skipped = 0
+    try:
+        with os.scandir(directory_path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        # 与 os.walk 一致：不进入符号链接目录
+                        if entry.name not in excluded_dirs and not entry.is_symlink():
+                            subdir_names.append(entry.name)
+                            subdirs.append((entry.path, os.path.join(relative_path, entry.name),
+                                            entry.stat().st_mtime_ns))
+                        continue
+                    if file_extension(entry.name) not in selected_extensions:
+                        continue
+                    mtime, original = make_file_readonly(entry)
+                    if original is None:
+                        skipped += 1
+                        # 同一个文件（mtime 未变）保留第一次修改前的属性，供撤销使用
+                        old_mtime, old_original = previous_files.get(entry.name, (None, None))
+                        if old_mtime == mtime:
+                            original = old_original
+                    else:
+                        changed += 1
+                    files.append((entry.name, mtime, original))
+                except OSError as e:
+                    errors.append(f"设置{entry.path}为只读时出错: {e}")
+    except OSError as e:
+        errors.append(f"读取目录{directory_path}时出错: {e}")
+
+    # 有错误的目录不记录，下次运行重新处理
+    record = None if errors else [dir_mtime, subdir_names, files]
+    return subdirs, changed, skipped, errors, record
+
+
+def set_tree_readonly(directory_path, selected_extensions, excluded_dirs, jobs=DEFAULT_JOBS,
+                      previous=None, on_progress=None, on_error=None):
+    """
+    多线程遍历目录树：每个目录是一个任务，扫描完成后再提交其子目录。
+    previous 为上次的目录记录 {相对路径: 记录}，为空时完整遍历。回调都在调用线程中执行。
+    返回 (修改数, 跳过数, 错误数, 本次目录记录)。
+    """
+    selected_extensions = {ext.lower() for ext in selected_extensions}
+    previous = previous or {}
+    records = {}
+    changed = skipped = error_count = 0
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        def submit(path, relative_path, dir_mtime):
+            future = pool.submit(scan_directory, path, relative_path, dir_mtime, selected_extensions,
+                                 excluded_dirs, previous.get(relative_path))
+            futures[future] = relative_path
+            return future
+
+        futures = {}
+        pending = {submit(directory_path, '', None)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, dir_changed, dir_skipped, errors, record = future.result()
+                for subdir in subdirs:
+                    pending.add(submit(*subdir))
+                if record is not None:
+                    records[futures[future]] = record
+                del futures[future]
+                changed += dir_changed
+                skipped += dir_skipped
+                error_count += len(errors)
+                if on_error is not None:
+                    for error_msg in errors:
+                        on_error(error_msg)
+                if on_progress is not None and (dir_changed or dir_skipped):
+                    on_progress(changed, skipped)
+
+    return changed, skipped, error_count, records
+
+
+def manifest_path_for(directory_path, manifest_dir=None):
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(directory_path)).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(manifest_dir or DEFAULT_MANIFEST_DIR, key + ".manifest")
+
+
+def load_manifest(manifest_path):
+    """返回记录内容，文件不存在或无法解析时返回 None"""
+    try:
+        with open(manifest_path, 'rb') as f:
+            manifest = json.loads(zlib.decompress(f.read()))
+    except (OSError, ValueError, zlib.error):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(manifest_path, directory_path, selected_extensions, excluded_dirs, records):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "root": os.path.abspath(directory_path),
+        "extensions": sorted(ext.lower() for ext in selected_extensions),
+        "excluded_dirs": sorted(excluded_dirs),
+        "dirs": records,
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(zlib.compress(json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode('utf-8')))
+    os.replace(tmp_path, manifest_path)
+
+
+def set_readonly_incremental(directory_path, selected_extensions, excluded_dirs, manifest_path=None,
+                             full=False, jobs=DEFAULT_JOBS, on_progress=None, on_error=None):
+    """
+    读取上次的记录增量处理，完成后写回记录。文件类型或排除目录改变、或 full 为 True 时完整遍历。
+    目录未变时仍会 stat 记录中的每个文件，被改回可写的文件也能发现。
+    """
+    manifest_path = manifest_path or manifest_path_for(directory_path)
+    manifest = None if full else load_manifest(manifest_path)
+    previous = None
+    if manifest is not None and \
+            manifest["extensions"] == sorted(ext.lower() for ext in selected_extensions) and \
+            manifest["excluded_dirs"] == sorted(excluded_dirs):
+        previous = manifest["dirs"]
+
+    changed, skipped, error_count, records = set_tree_readonly(
+        directory_path, selected_extensions, excluded_dirs, jobs, previous, on_progress, on_error)
+    save_manifest(manifest_path, directory_path, selected_extensions, excluded_dirs, records)
+    return changed, skipped, error_count
+
+
+def iter_matching_files(directory_path, selected_extensions, excluded_dirs, on_error=None):
+    """递归产出 (文件路径, None)；无法读取的目录回调 on_error 后跳过，不中断整个遍历"""
+    selected_extensions = {ext.lower() for ext in selected_extensions}
+    try:
+        with os.scandir(directory_path) as it:
+            entries = list(it)
+    except OSError as e:
+        if on_error is not None:
+            on_error(f"读取目录{directory_path}时出错: {e}")
+        return
+    for entry in entries:
+        try:
+            is_subdir = entry.is_dir() and entry.name not in excluded_dirs and not entry.is_symlink()
+        except OSError as e:
+            if on_error is not None:
+                on_error(f"读取{entry.path}时出错: {e}")
+            continue
+        if is_subdir:
+            yield from iter_matching_files(entry.path, selected_extensions, excluded_dirs, on_error)
+        elif file_extension(entry.name) in selected_extensions:
+            yield entry.path, None
+
+
+def restore_writable(directory_path, selected_extensions, excluded_dirs, manifest_path=None, on_error=None):
+    """
+    撤销只读：按记录恢复文件原来的属性，不需要遍历目录；
+    没有记录时退回遍历目录，去掉所有匹配文件的只读位。返回 (恢复数, 错误数)。
+    """
+    manifest_path = manifest_path or manifest_path_for(directory_path)
+    manifest = load_manifest(manifest_path)
+    restored = error_count = 0
+
+    def report_error(error_msg):
+        nonlocal error_count
+        error_count += 1
+        if on_error is not None:
+            on_error(error_msg)
+
+    if manifest is None:
+        for file_path, original in iter_matching_files(directory_path, selected_extensions, excluded_dirs,
+                                                       report_error):
+            try:
+                make_file_writable(file_path, original)
+                restored += 1
+            except OSError as e:
+                report_error(f"恢复{file_path}为可写时出错: {e}")
+        return restored, error_count
+
+    failed = {}
+    for relative_path, record in manifest["dirs"].items():
+        for name, mtime, original in record[2]:
+            file_path = os.path.join(directory_path, relative_path, name)
+            try:
+                make_file_writable(file_path, original)
+                restored += 1
+            except OSError as e:
+                report_error(f"恢复{file_path}为可写时出错: {e}")
+                failed.setdefault(relative_path, [None, [], []])[2].append([name, mtime, original])
+
+    # 属性改变不会更新目录 mtime，记录必须作废，下次运行完整遍历。
+    # 有文件恢复失败时只保留这些文件的记录（目录 mtime 记为 None，不会被当作未变），下次撤销可以重试
+    if failed:
+        save_manifest(manifest_path, directory_path, manifest["extensions"], manifest["excluded_dirs"], failed)
+    else:
+        os.remove(manifest_path)
+    return restored, error_count
+
+
+class TaskStatus:
+    """
+    工作线程只更新计数器，界面线程按固定间隔读取，
+    避免每个文件、每个错误都向 Tk 事件队列投递回调。错误只保留前 MAX_REPORTED_ERRORS 条。
+    """
+
+    def __init__(self):
+        self.changed = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+        self.done = False
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+    @property
+    def processed(self):
+        return self.changed + self.skipped
+
+    @property
+    def elapsed(self):
+        return (self.end_time or time.perf_counter()) - self.start_time
+
+    def on_progress(self, changed, skipped):
+        self.changed, self.skipped = changed, skipped
+
+    def on_error(self, error_msg):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error_msg)
+
+    def finish(self):
+        self.end_time = time.perf_counter()
+        self.done = True
+
+    def summary(self, state="只读"):
+        elapsed = self.elapsed
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        lines = [f"任务完成！共设置{self.changed}个文件为{state}，跳过{self.skipped}个，"
+                 f"耗时{elapsed:.2f}秒（{rate:.0f} 文件/秒）。"]
+        if self.error_count:
+            lines.append(f"出错{self.error_count}个：")
+            lines.extend(f"  {error_msg}" for error_msg in self.errors)
+            if self.error_count > len(self.errors):
+                lines.append(f"  ……另有{self.error_count - len(self.errors)}个错误未显示")
+        return "\n".join(lines)
+
+
+def run_task(directory_paths, selected_extensions, excluded_dirs, status, undo=False, full=False,
+             jobs=DEFAULT_JOBS, manifest_dir=None):
+    """依次处理多个目录，结果累计到 status 中；GUI 和命令行共用"""
+    changed = skipped = 0
+    try:
+        for directory_path in directory_paths:
+            manifest_path = manifest_path_for(directory_path, manifest_dir)
+            if undo:
+                restored, _ = restore_writable(directory_path, selected_extensions, excluded_dirs,
+                                               manifest_path, on_error=status.on_error)
+                changed += restored
+            else:
+                def on_progress(dir_changed, dir_skipped):
+                    status.on_progress(changed + dir_changed, skipped + dir_skipped)
+
+                dir_changed, dir_skipped, _ = set_readonly_incremental(
+                    directory_path, selected_extensions, excluded_dirs, manifest_path, full, jobs,
+                    on_progress=on_progress, on_error=status.on_error)
+                changed += dir_changed
+                skipped += dir_skipped
+            status.on_progress(changed, skipped)
+    except Exception as e:
+        status.on_error(f"处理时出错: {e}")
     finally:
-        # 任务完成，更新UI并重新启用按钮
-        root.after(0, lambda: start_button.config(state=tk.NORMAL))
-        root.after(0, update_ui, text_output, f"\n任务完成！共设置{len(modified_files)}个文件为只读。\n")
-        root.after(0, lambda: messagebox.showinfo("完成", f"已将{len(modified_files)}个文件设置为只读"))
+        status.finish()
+
+
+def poll_task(status, undo, last_processed=-1):
+    """界面线程中每 PROGRESS_INTERVAL_MS 刷新一次进度，计数未变时不输出"""
+    state = "可写" if undo else "只读"
+    if status.done:
+        update_ui(text_output, f"\n{status.summary(state)}\n")
+        start_button.config(state=tk.NORMAL)
+        undo_button.config(state=tk.NORMAL)
+        messagebox.showinfo("完成", f"已将{status.changed}个文件设置为{state}"
+                                  + (f"，{status.error_count}个文件出错" if status.error_count else ""))
+        return
+    processed = status.processed
+    if processed != last_processed:
+        update_ui(text_output, f"已处理{processed}个文件（跳过已只读{status.skipped}个）...\n")
+    root.after(PROGRESS_INTERVAL_MS, poll_task, status, undo, processed)
 
 
 def update_ui(text_output, message):
@@ -165,104 +506,169 @@ def reset_extensions():
     reset_list("文件类型", extensions_listbox, EXTENSIONS, DEFAULT_EXTENSIONS)
 
 
-def start_task():
+def start_task(undo=False):
     directory_path = entry_path.get()
 
     if not directory_path or not EXTENSIONS:
         messagebox.showwarning("警告", "请选择一个目录和至少一个文件扩展名。")
         return
 
-    # 使用线程处理长时间任务
-    task_thread = threading.Thread(target=set_files_readonly,
-                                   args=(directory_path, EXTENSIONS, text_output, start_button))
+    # 禁用按钮并清空文本框
+    start_button.config(state=tk.DISABLED)
+    undo_button.config(state=tk.DISABLED)
+    text_output.config(state=tk.NORMAL)
+    text_output.delete(1.0, tk.END)
+    text_output.config(state=tk.DISABLED)
+
+    # 使用线程处理长时间任务，界面定时读取进度
+    status = TaskStatus()
+    task_thread = threading.Thread(target=run_task,
+                                   args=([directory_path], set(EXTENSIONS), set(EXCLUDED_DIRS), status, undo,
+                                         full_var.get()))
     task_thread.daemon = True  # 设为守护线程，主程序退出时自动结束
     task_thread.start()
+    root.after(PROGRESS_INTERVAL_MS, poll_task, status, undo)
+
+
+def main():
+    global root, entry_path, excluded_dirs_listbox, extensions_listbox, start_button, undo_button, text_output
+    global full_var, tk, filedialog, messagebox, simpledialog
+    # 只有界面需要 Tk，命令行模式不导入，构建机上无需安装 Tk
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, simpledialog
+
+    # 创建主窗口
+    root = tk.Tk()
+    root.title("UE引擎源码只读工具 - @FiveMileFog")
+    root.geometry("460x550")  # 适当调整窗口大小
+
+    # 创建选择路径的部件
+    tk.Label(root, text="选择目录:").grid(row=0, column=0, padx=10, pady=10)
+    entry_path = tk.Entry(root, width=40)
+    entry_path.grid(row=0, column=1, padx=10, pady=10)
+    tk.Button(root, text="浏览", command=browse_directory).grid(row=0, column=2, padx=10, pady=10)
+
+    # 添加排除目录列表部分
+    tk.Label(root, text="排除目录列表:").grid(row=1, column=0, pady=0, columnspan=3)
+
+    # 创建排除目录列表框
+    excluded_dirs_frame = tk.Frame(root)
+    excluded_dirs_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
+
+    excluded_dirs_listbox = tk.Listbox(excluded_dirs_frame, height=4, width=40)
+    excluded_dirs_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    # 添加排除目录列表滚动条
+    excluded_dirs_scrollbar = tk.Scrollbar(excluded_dirs_frame, command=excluded_dirs_listbox.yview)
+    excluded_dirs_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    excluded_dirs_listbox.config(yscrollcommand=excluded_dirs_scrollbar.set)
+
+    # 排除目录操作按钮
+    excluded_dirs_buttons_frame = tk.Frame(root)
+    excluded_dirs_buttons_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=5)
+
+    add_button = tk.Button(excluded_dirs_buttons_frame, text="添加目录", command=add_excluded_dir)
+    add_button.pack(side=tk.LEFT, padx=5)
+
+    remove_button = tk.Button(excluded_dirs_buttons_frame, text="删除选中", command=remove_excluded_dir)
+    remove_button.pack(side=tk.LEFT, padx=5)
 
+    reset_button = tk.Button(excluded_dirs_buttons_frame, text="重置为默认", command=reset_excluded_dirs)
+    reset_button.pack(side=tk.LEFT, padx=5)
 
-# 创建主窗口
-root = tk.Tk()
-root.title("UE引擎源码只读工具 - @FiveMileFog")
-root.geometry("460x550")  # 适当调整窗口大小
+    # 添加文件类型列表部分
+    tk.Label(root, text="文件类型列表:").grid(row=4, column=0, pady=0, columnspan=3)
 
-# 创建选择路径的部件
-tk.Label(root, text="选择目录:").grid(row=0, column=0, padx=10, pady=10)
-entry_path = tk.Entry(root, width=40)
-entry_path.grid(row=0, column=1, padx=10, pady=10)
-tk.Button(root, text="浏览", command=browse_directory).grid(row=0, column=2, padx=10, pady=10)
+    # 创建文件类型列表框
+    extensions_frame = tk.Frame(root)
+    extensions_frame.grid(row=5, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
 
-# 添加排除目录列表部分
-tk.Label(root, text="排除目录列表:").grid(row=1, column=0, pady=0, columnspan=3)
+    extensions_listbox = tk.Listbox(extensions_frame, height=4, width=40)
+    extensions_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-# 创建排除目录列表框
-excluded_dirs_frame = tk.Frame(root)
-excluded_dirs_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
+    # 添加文件类型列表滚动条
+    extensions_scrollbar = tk.Scrollbar(extensions_frame, command=extensions_listbox.yview)
+    extensions_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    extensions_listbox.config(yscrollcommand=extensions_scrollbar.set)
 
-excluded_dirs_listbox = tk.Listbox(excluded_dirs_frame, height=4, width=40)
-excluded_dirs_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    # 文件类型操作按钮
+    extensions_buttons_frame = tk.Frame(root)
+    extensions_buttons_frame.grid(row=6, column=0, columnspan=3, padx=10, pady=5)
 
-# 添加排除目录列表滚动条
-excluded_dirs_scrollbar = tk.Scrollbar(excluded_dirs_frame, command=excluded_dirs_listbox.yview)
-excluded_dirs_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-excluded_dirs_listbox.config(yscrollcommand=excluded_dirs_scrollbar.set)
+    add_ext_button = tk.Button(extensions_buttons_frame, text="添加类型", command=add_extension)
+    add_ext_button.pack(side=tk.LEFT, padx=5)
 
-# 排除目录操作按钮
-excluded_dirs_buttons_frame = tk.Frame(root)
-excluded_dirs_buttons_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=5)
+    remove_ext_button = tk.Button(extensions_buttons_frame, text="删除选中", command=remove_extension)
+    remove_ext_button.pack(side=tk.LEFT, padx=5)
 
-add_button = tk.Button(excluded_dirs_buttons_frame, text="添加目录", command=add_excluded_dir)
-add_button.pack(side=tk.LEFT, padx=5)
+    reset_ext_button = tk.Button(extensions_buttons_frame, text="重置为默认", command=reset_extensions)
+    reset_ext_button.pack(side=tk.LEFT, padx=5)
 
-remove_button = tk.Button(excluded_dirs_buttons_frame, text="删除选中", command=remove_excluded_dir)
-remove_button.pack(side=tk.LEFT, padx=5)
+    # 创建开始任务和撤销按钮
+    task_buttons_frame = tk.Frame(root)
+    task_buttons_frame.grid(row=7, column=0, columnspan=3, pady=10)
 
-reset_button = tk.Button(excluded_dirs_buttons_frame, text="重置为默认", command=reset_excluded_dirs)
-reset_button.pack(side=tk.LEFT, padx=5)
+    start_button = tk.Button(task_buttons_frame, text="开始处理", command=start_task)
+    start_button.pack(side=tk.LEFT, padx=5)
 
-# 添加文件类型列表部分
-tk.Label(root, text="文件类型列表:").grid(row=4, column=0, pady=0, columnspan=3)
+    undo_button = tk.Button(task_buttons_frame, text="撤销只读", command=lambda: start_task(undo=True))
+    undo_button.pack(side=tk.LEFT, padx=5)
 
-# 创建文件类型列表框
-extensions_frame = tk.Frame(root)
-extensions_frame.grid(row=5, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
+    # 忽略上次的记录，重新遍历整个目录树
+    full_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(task_buttons_frame, text="完整遍历", variable=full_var).pack(side=tk.LEFT, padx=5)
 
-extensions_listbox = tk.Listbox(extensions_frame, height=4, width=40)
-extensions_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    # 创建滚动框
+    # tk.Label(root, text="处理日志:").grid(row=8, column=0, pady=0, columnspan=3)
+    text_output = tk.Text(root, height=10, width=50, state=tk.DISABLED)
+    text_output.grid(row=9, column=0, columnspan=3, pady=10, padx=10, sticky="ew")
 
-# 添加文件类型列表滚动条
-extensions_scrollbar = tk.Scrollbar(extensions_frame, command=extensions_listbox.yview)
-extensions_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-extensions_listbox.config(yscrollcommand=extensions_scrollbar.set)
+    # 添加滚动条
+    scrollbar = tk.Scrollbar(root, command=text_output.yview)
+    scrollbar.grid(row=9, column=3, pady=10, sticky="ns")
+    text_output.config(yscrollcommand=scrollbar.set)
 
-# 文件类型操作按钮
-extensions_buttons_frame = tk.Frame(root)
-extensions_buttons_frame.grid(row=6, column=0, columnspan=3, padx=10, pady=5)
+    # 初始化列表显示
+    update_list(excluded_dirs_listbox, EXCLUDED_DIRS)
+    update_list(extensions_listbox, EXTENSIONS)
+
+    # 运行主循环
+    root.mainloop()
 
-add_ext_button = tk.Button(extensions_buttons_frame, text="添加类型", command=add_extension)
-add_ext_button.pack(side=tk.LEFT, padx=5)
 
-remove_ext_button = tk.Button(extensions_buttons_frame, text="删除选中", command=remove_extension)
-remove_ext_button.pack(side=tk.LEFT, padx=5)
+def parse_list(value):
+    return {item.strip() for item in value.split(',') if item.strip()}
 
-reset_ext_button = tk.Button(extensions_buttons_frame, text="重置为默认", command=reset_extensions)
-reset_ext_button.pack(side=tk.LEFT, padx=5)
 
-# 创建开始任务按钮
-start_button = tk.Button(root, text="开始处理", command=start_task)
-start_button.grid(row=7, column=0, columnspan=3, pady=10)
+def run_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Mark Unreal Engine source files read-only without the GUI.")
+    parser.add_argument("dirs", nargs="+", help="source directories to process")
+    parser.add_argument("--extensions", default=",".join(sorted(DEFAULT_EXTENSIONS)),
+                        help="comma separated file extensions (default: %(default)s)")
+    parser.add_argument("--exclude", default=",".join(sorted(DEFAULT_EXCLUDED_DIRS)),
+                        help="comma separated directory names to skip (default: %(default)s)")
+    parser.add_argument("--undo", action="store_true", help="restore the files made read-only by the last run")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and walk the whole tree")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="worker threads (default: %(default)s)")
+    parser.add_argument("--manifest-dir", default=None,
+                        help="manifest directory (default: ~/.cache/SetUESourceCodeReadOnly)")
+    args = parser.parse_args(argv)
 
-# 创建滚动框
-# tk.Label(root, text="处理日志:").grid(row=8, column=0, pady=0, columnspan=3)
-text_output = tk.Text(root, height=10, width=50, state=tk.DISABLED)
-text_output.grid(row=9, column=0, columnspan=3, pady=10, padx=10, sticky="ew")
+    extensions = {ext if ext.startswith('.') else '.' + ext for ext in parse_list(args.extensions)}
+    if not extensions:
+        parser.error("no file extensions")
+    missing = [d for d in args.dirs if not os.path.isdir(d)]
+    if missing:
+        parser.error(f"not a directory: {', '.join(missing)}")
 
-# 添加滚动条
-scrollbar = tk.Scrollbar(root, command=text_output.yview)
-scrollbar.grid(row=9, column=3, pady=10, sticky="ns")
-text_output.config(yscrollcommand=scrollbar.set)
+    status = TaskStatus()
+    run_task(args.dirs, extensions, parse_list(args.exclude), status, args.undo, args.full,
+             args.jobs, args.manifest_dir)
+    print(status.summary("可写" if args.undo else "只读"))
+    return 1 if status.error_count else 0
 
-# 初始化列表显示
-update_list(excluded_dirs_listbox, EXCLUDED_DIRS)
-update_list(extensions_listbox, EXTENSIONS)
 
-# 运行主循环
-root.mainloop()
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli())
+    main()
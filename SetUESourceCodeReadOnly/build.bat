@@ -1 +1,3 @@
-pyinstaller ./SetUESourceCodeReadOnly.py -Fw -i="./UESourceCodeReadOnly.ico"
\ No newline at end of file
+pyinstaller ./SetUESourceCodeReadOnly.py -Fw -i="./UESourceCodeReadOnly.ico"
+rem 命令行版本（给构建机使用），保留控制台以输出结果
+pyinstaller ./SetUESourceCodeReadOnly.py -F -n SetUESourceCodeReadOnlyCLI -i="./UESourceCodeReadOnly.ico"
\ No newline at end of file
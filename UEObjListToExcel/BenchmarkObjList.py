@@ -0,0 +1,65 @@
+# BenchmarkObjList.py
+# 用合成的 obj list 日志（默认 500 万行，混入 MemReport 风格的无前缀行）测量 UEObjListToExcel 的解析速度和峰值内存
+# 用法:
+#   python BenchmarkObjList.py [--lines N]
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from UEObjListToExcel import read_log_dataframe
+
+DEFAULT_LINE_COUNT = 5_000_000
+
+
+def write_synthetic_log(path, line_count):
+    """生成与 obj list 输出格式相同的日志，每 4 行混入一行无前缀的 MemReport 风格数据"""
+    header = "[2025.01.01-00.00.00:000][123]{:>40}{:>10}{:>12}{:>12}{:>12}\n".format(
+        "Class", "Count", "NumKB", "MaxKB", "ResExcKB")
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write("[2025.01.01-00.00.00:000][123]LogObj: Display: Obj List:\n")
+        fp.write(header)
+        for i in range(line_count):
+            name = f"Class{i % 5000}"
+            prefix = "[2025.01.01-00.00.00:000][123]" if i % 4 else ""
+            fp.write(f"{prefix}{name:>40}{i % 997:>10}{i * 0.25:>12.2f}{i * 0.5:>12.2f}{0:>12.2f}\n")
+
+
+def peak_rss_mb():
+    try:
+        import resource  # 仅 Unix 可用
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(path, line_count):
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    start = time.perf_counter()
+    dataframe = read_log_dataframe(path)
+    elapsed = time.perf_counter() - start
+
+    print(f"lines: {line_count}, log size: {size_mb:.1f} MB, rows: {len(dataframe)}")
+    print(f"parse: {elapsed:.2f}s ({line_count / elapsed:,.0f} lines/s)")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"peak RSS: {rss:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure UEObjListToExcel parsing speed on a synthetic obj list log.")
+    parser.add_argument("--lines", type=int, default=DEFAULT_LINE_COUNT,
+                        help="data lines in the synthetic log (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "objlist.log")
+        write_synthetic_log(path, args.lines)
+        run(path, args.lines)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
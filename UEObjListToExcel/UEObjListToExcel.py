@@ -1,70 +1,280 @@
 import re
 import pandas as pd
+import numpy as np
 import sys
 import os
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
-# 兼容下 MemReport
-def ensure_timestamp_and_frame(line):
-    # 正则表达式匹配 [时间戳][帧号] 开头
-    timestamp_frame_regex = re.compile(r"^\[\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3}\]\[\d+\]")
+# 兼容下 MemReport：没有 [时间戳][帧号] 前缀的行按默认前缀处理
+DEFAULT_TIMESTAMP = "[2025.01.01-00.00.00:000]"
+DEFAULT_FRAME = "[0]"
 
-    # 检查是否以 [时间戳][帧号] 开头
-    if not timestamp_frame_regex.match(line):
-        # 如果不是，填充默认的时间戳和帧号
-        default_timestamp = "[2025.01.01-00.00.00:000]"
-        default_frame = "[0]"
-        line = f"{default_timestamp}{default_frame}{line}"
+# 正则表达式匹配 [时间戳][帧号] 开头
+TIMESTAMP_FRAME_REGEX = re.compile(r"^\[\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3}\]\[\d+\]")
 
-    return line
+# Regex to match lines containing data
+DATA_LINE_REGEX = re.compile(r"^\[(.*?)\]\s+(\S+.*?)\s+(.*)$")
 
-def parse_log_to_excel(file_path):
-    # Read log data from the file
-    with open(file_path, 'r', encoding='utf-8') as file:
-        log_data = file.read()
+# 与 DATA_LINE_REGEX 作用在“默认前缀 + 行”上的结果等价，但无需拼接新字符串：
+# 行首为空白时时间戳即默认前缀；否则时间戳延伸到行内第一个后跟空白的 ']'
+UNPREFIXED_LINE_REGEX = re.compile(r"^(?:(.*?)\])??\s+(\S+.*?)\s+(.*)$")
+DEFAULT_TIMESTAMP_GROUP = DEFAULT_TIMESTAMP[1:] + DEFAULT_FRAME[:-1]
 
-    # Extracting lines that contain relevant data
-    lines = log_data.splitlines()
-    data_lines = []
+VALUE_SPLIT_REGEX = re.compile(r"\s{2,}")
 
-    # Regex to match lines containing data
-    regex = re.compile(r"^\[(.*?)\]\s+(\S+.*?)\s+(.*)$")
 
-    # Extract the data
-    headers = []
+def iter_log_lines(file):
+    """逐行读取，不把整个日志读进内存"""
+    for line in file:
+        yield line.rstrip("\r\n")
+
+
+def iter_data_rows(lines):
+    """产出 (timestamp, identifier, values)，只做前缀判断，不改写原始行"""
+    prefix_match = TIMESTAMP_FRAME_REGEX.match
+    prefixed_match = DATA_LINE_REGEX.match
+    unprefixed_match = UNPREFIXED_LINE_REGEX.match
     for line in lines:
-        line = ensure_timestamp_and_frame(line)
-        match = regex.match(line)
-        if match:
-            timestamp, identifier, values = match.groups()
-            value_columns = re.split(r"\s{2,}", values)
-            if not headers:
-                headers = ["Timestamp", "Identifier"] + value_columns
-                continue
-            data_lines.append([timestamp, identifier] + value_columns)
-
-    # Create column names based on headers
-    columns = headers
-
-    # Convert extracted data into a DataFrame
-    dataframe = pd.DataFrame(data_lines, columns=columns)
-
-    # Convert numeric columns to the appropriate data type
-    for col in columns[2:]:
-        dataframe[col] = pd.to_numeric(dataframe[col], errors='coerce')
+        if prefix_match(line):
+            match = prefixed_match(line)
+            if match:
+                yield match.groups()
+        else:
+            match = unprefixed_match(line)
+            if match:
+                extra, identifier, values = match.groups()
+                timestamp = DEFAULT_TIMESTAMP_GROUP if extra is None else f"{DEFAULT_TIMESTAMP_GROUP}]{extra}"
+                yield timestamp, identifier, values
+
+
+class NumericColumn:
+    """
+    直接收集到 array('d') 中，无法解析的值记为 NaN（等价于 to_numeric(errors='coerce')）。
+    全部为整数时输出 int64 列。
+    """
+
+    def __init__(self):
+        self.values = array("d")
+        self.all_int = True
+
+    def append(self, text):
+        try:
+            value = float(text)
+        except (TypeError, ValueError):
+            value = float("nan")
+            self.all_int = False
+        else:
+            if self.all_int and not value.is_integer():
+                self.all_int = False
+        self.values.append(value)
+
+    def to_numpy(self):
+        data = np.frombuffer(self.values, dtype=np.float64) if self.values else np.empty(0)
+        return data.astype(np.int64) if self.all_int and len(data) else data.copy()
+
+
+def parse_log_columns(lines):
+    """
+    返回 (headers, timestamps, identifiers, numeric_columns)。
+    第一条数据行作为表头，其余行直接写入按列存储的数组。
+    """
+    headers = []
+    timestamps = []
+    identifiers = []
+    numeric_columns = []
+    interned = {}
+    split_values = VALUE_SPLIT_REGEX.split
+
+    for timestamp, identifier, values in iter_data_rows(lines):
+        value_columns = split_values(values)
+        if not headers:
+            headers = ["Timestamp", "Identifier"] + value_columns
+            numeric_columns = [NumericColumn() for _ in value_columns]
+            continue
+        # 时间戳和类名大量重复，复用同一个字符串对象，列表里只存引用
+        timestamps.append(interned.setdefault(timestamp, timestamp))
+        identifiers.append(interned.setdefault(identifier, identifier))
+        for column, value in zip(numeric_columns, value_columns):
+            column.append(value)
+        # 值个数不足的行补 NaN
+        for column in numeric_columns[len(value_columns):]:
+            column.append(None)
+
+    return headers, timestamps, identifiers, numeric_columns
+
+
+def build_dataframe(headers, timestamps, identifiers, numeric_columns):
+    data = {}
+    if headers:
+        data[headers[0]] = timestamps
+        data[headers[1]] = identifiers
+        for name, column in zip(headers[2:], numeric_columns):
+            data[name] = column.to_numpy()
+    return pd.DataFrame(data, columns=headers)
+
+
+def read_log_dataframe(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return build_dataframe(*parse_log_columns(iter_log_lines(file)))
+
+
+def iter_typed_rows(dataframe):
+    """逐行产出原生 Python 类型的值，NaN 写为空单元格"""
+    for row in dataframe.itertuples(index=False, name=None):
+        yield [None if value != value else value for value in row]
+
+
+def write_xlsx(dataframe, output_file):
+    """
+    流式写出 xlsx，不构建完整的单元格对象图。
+    优先使用 xlsxwriter 的 constant_memory 模式，未安装时退回 openpyxl 的 write_only 模式。
+    """
+    try:
+        import xlsxwriter  # pip install xlsxwriter
+    except ImportError:
+        xlsxwriter = None
+
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(output_file, {"constant_memory": True, "nan_inf_to_errors": True})
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, list(dataframe.columns))
+        for row_index, row in enumerate(iter_typed_rows(dataframe), start=1):
+            worksheet.write_row(row_index, 0, row)
+        workbook.close()
+        return
+
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(list(dataframe.columns))
+    for row in iter_typed_rows(dataframe):
+        worksheet.append(row)
+    workbook.save(output_file)
+
+
+def write_csv(dataframe, output_file):
+    # utf-8-sig 方便 Excel 直接打开
+    dataframe.to_csv(output_file, index=False, encoding="utf-8-sig")
+
+
+def write_parquet(dataframe, output_file):
+    # 需要 pyarrow 或 fastparquet
+    dataframe.to_parquet(output_file, index=False)
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+def parse_log_to_excel(file_path, output_format="xlsx", output_file=None):
+    dataframe = read_log_dataframe(file_path)
 
     # Generate output file name based on input file name
-    base_name = os.path.splitext(file_path)[0]
-    output_file = f"{base_name}.xlsx"
+    if output_file is None:
+        base_name = os.path.splitext(file_path)[0]
+        output_file = f"{base_name}.{output_format}"
 
-    # Save to Excel file
-    dataframe.to_excel(output_file, index=False)
+    WRITERS[output_format](dataframe, output_file)
 
     print(f"Data has been successfully saved to '{output_file}'.")
 
+
+DEFAULT_DIFF_METRICS = ("Count", "NumKB")
+
+
+def capture_label(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def read_captures(file_paths, jobs=None):
+    """多进程并行解析多个日志，返回与输入顺序一致的 DataFrame 列表"""
+    if len(file_paths) == 1:
+        return [read_log_dataframe(file_paths[0])]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(read_log_dataframe, file_paths))
+
+
+def diff_captures(captures, labels, metrics=DEFAULT_DIFF_METRICS, top=20):
+    """
+    按 Identifier（类名）把多次采集对齐到同一张表：
+    每个指标输出各次采集的值、首末差值，以及是否每次采集都不减少（疑似泄漏）。
+    返回 (diff, top_growers)。
+    """
+    metrics = [m for m in metrics if all(m in df.columns for df in captures)]
+    if not metrics:
+        raise ValueError("None of the requested metrics exist in every capture.")
+
+    # 同一次采集中重复出现的类名（例如 MemReport 中的多张表）先求和，再一次性外连接
+    frames = {label: df.groupby("Identifier", sort=False)[metrics].sum()
+              for label, df in zip(labels, captures)}
+    joined = pd.concat(frames, axis=1, join="outer").fillna(0)
+
+    columns = {}
+    for metric in metrics:
+        values = joined.xs(metric, axis=1, level=1)[labels]
+        # 外连接补 0 后恢复整数列类型
+        if all(pd.api.types.is_integer_dtype(df[metric]) for df in captures):
+            values = values.astype(np.int64)
+        for label in labels:
+            columns[f"{metric} [{label}]"] = values[label]
+        data = values.to_numpy()
+        columns[f"{metric} Delta"] = data[:, -1] - data[:, 0]
+        columns[f"{metric} Monotonic"] = (np.diff(data, axis=1) >= 0).all(axis=1) & (data[:, -1] > data[:, 0])
+
+    diff = pd.DataFrame(columns, index=joined.index)
+    diff.index.name = "Identifier"
+
+    primary = f"{metrics[0]} Delta"
+    diff = diff.sort_values(primary, ascending=False)
+    top_growers = diff[diff[primary] > 0].head(top)
+    diff["Top Grower"] = diff.index.isin(top_growers.index)
+    return diff.reset_index(), top_growers
+
+
+def diff_logs(file_paths, output_format="xlsx", output_file=None, metrics=DEFAULT_DIFF_METRICS, top=20, jobs=None):
+    captures = read_captures(file_paths, jobs)
+    labels = [capture_label(path) for path in file_paths]
+    # 同名文件加序号区分
+    if len(set(labels)) != len(labels):
+        labels = [f"{i + 1}:{label}" for i, label in enumerate(labels)]
+
+    diff, top_growers = diff_captures(captures, labels, metrics, top)
+
+    if output_file is None:
+        base_name = os.path.splitext(file_paths[-1])[0]
+        output_file = f"{base_name}_diff.{output_format}"
+    WRITERS[output_format](diff, output_file)
+
+    primary = [column for column in top_growers.columns if column.endswith(" Delta")]
+    print(f"Top growers between '{labels[0]}' and '{labels[-1]}':")
+    for identifier, row in top_growers.iterrows():
+        deltas = ", ".join(f"{column[:-len(' Delta')]} {row[column]:+g}" for column in primary)
+        print(f"  {identifier}: {deltas}")
+    print(f"Diff of {len(file_paths)} captures has been saved to '{output_file}'.")
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <log_file_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Convert an UE 'obj list' / MemReport log into an Excel table.")
+    parser.add_argument("log_file_paths", nargs="+", metavar="log_file_path", help="path to the log file(s)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="xlsx", help="output format (default: xlsx)")
+    parser.add_argument("--output", help="output file (default: log path with the format's extension)")
+    parser.add_argument("--diff", action="store_true",
+                        help="join two or more captures on Identifier and report per-class deltas")
+    parser.add_argument("--metrics", default=",".join(DEFAULT_DIFF_METRICS),
+                        help="comma separated columns compared in --diff mode (default: Count,NumKB)")
+    parser.add_argument("--top", type=int, default=20, help="number of top growers flagged in --diff mode")
+    parser.add_argument("--jobs", type=int, default=None, help="parser processes in --diff mode (default: CPU count)")
+    args = parser.parse_args()
 
-    log_file_path = sys.argv[1]
-    parse_log_to_excel(log_file_path)
\ No newline at end of file
+    if args.diff and len(args.log_file_paths) >= 2:
+        diff_logs(args.log_file_paths, args.format, args.output, args.metrics.split(","), args.top, args.jobs)
+    elif len(args.log_file_paths) == 1 and not args.diff:
+        parse_log_to_excel(args.log_file_paths[0], args.format, args.output)
+    else:
+        parser.print_usage()
+        sys.exit(1)
@@ -1,62 +1,338 @@
 import re
 import pandas as pd
+import numpy as np
 import sys
 import os
-from openpyxl import load_workbook
+import argparse
+from array import array
+from openpyxl import Workbook
 
+# 整行匹配 PrintUserWidgetChildrenNumber 的输出，UE 日志行为 [时间戳][帧号]LogTemp: 加上内容，
+# 也接受直接粘贴的不带前缀的内容：
+#   [...][ 42]LogTemp: ==== WBP_Foo_C: 3 ====      -> 第 1 组为帧号，第 2、3 组
+#   [...][ 42]LogTemp:     TextBlock: 12           -> 第 4、5 组（子控件行必须缩进）
+RECORD_REGEX = re.compile(
+    r"(?:(?:\[[^\]]*\]\[\s*(\d+)\])?LogTemp:\s)?"
+    r"(?:\s*====\s+(\w+_C):\s+(\d+)\s+====|\s+(\w+):\s+(\d+))\s*$")
 
-def parse_log_to_excel(file_path):
+# iter_widget_records 产出的记录类型；RECORD_END 表示当前控件头的子控件行已经结束
+RECORD_WIDGET, RECORD_CHILD, RECORD_END = range(3)
+
+
+def iter_widget_records(lines):
+    """
+    产出 (记录类型, name, count, frame)，没有日志前缀时 frame 为 None。
+    先用子串做廉价过滤：控件头必含 '===='，子控件行必含 ': ' 且以数字结尾，其余日志行不进正则。
+    子控件行只在紧跟控件头（或其它子控件行）时有效，中间出现任何其它日志行即产出 RECORD_END，
+    之后的子控件行在下一个控件头之前都被丢弃。
+    """
+    match_record = RECORD_REGEX.match
+    in_block = False
+    for line in lines:
+        match = None
+        if "====" in line:
+            match = match_record(line)
+        else:
+            tail = line.rstrip()
+            if tail and tail[-1].isdigit() and ": " in tail:
+                match = match_record(line)
+        if match is None:
+            if in_block:
+                in_block = False
+                yield RECORD_END, None, 0, None
+            continue
+        frame, widget, widget_count, child, child_count = match.groups()
+        frame = int(frame) if frame is not None else None
+        if widget is not None:
+            in_block = True
+            yield RECORD_WIDGET, widget, int(widget_count), frame
+        elif in_block:
+            yield RECORD_CHILD, child, int(child_count), frame
+
+
+class WidgetChildMatrix:
+    """
+    UserWidget × 子控件类型的计数矩阵。解析时只追加到三个紧凑数组（行、列、值），
+    最后一次性铺成 Int64 表，不构建嵌套 dict。
+    同一个控件再次出现时从新的控件头开始计数，之前的子控件统计被丢弃。
+    """
+
+    def __init__(self):
+        self.widget_index = {}
+        self.child_index = {}
+        self.instance_counts = array("q")
+        self.row_start = array("Q")
+        self.rows = array("I")
+        self.cols = array("I")
+        self.counts = array("q")
+        self.current_row = None
+
+    def add_widget(self, name, count):
+        row = self.widget_index.get(name)
+        if row is None:
+            row = self.widget_index[name] = len(self.instance_counts)
+            self.instance_counts.append(count)
+            self.row_start.append(len(self.counts))
+        else:
+            self.instance_counts[row] = count
+            self.row_start[row] = len(self.counts)
+        self.current_row = row
+
+    def end_block(self):
+        self.current_row = None
+
+    def add_child(self, name, count):
+        if self.current_row is None:
+            return
+        col = self.child_index.get(name)
+        if col is None:
+            col = self.child_index[name] = len(self.child_index)
+        self.rows.append(self.current_row)
+        self.cols.append(col)
+        self.counts.append(count)
+
+    def to_dataframe(self):
+        widgets = list(self.widget_index)
+        all_children = list(self.child_index)
+        rows = np.frombuffer(self.rows, dtype=np.uint32)
+        cols = np.frombuffer(self.cols, dtype=np.uint32)
+        counts = np.frombuffer(self.counts, dtype=np.int64)
+        # 只保留每个控件最后一次出现之后的记录；列也只取保留下来的记录中出现过的子控件类型
+        keep = np.arange(len(counts)) >= np.frombuffer(self.row_start, dtype=np.uint64)[rows] \
+            if len(counts) else np.zeros(0, dtype=bool)
+        used = np.unique(cols[keep])
+        children = [all_children[i] for i in used]
+        col_map = np.zeros(len(all_children), dtype=np.intp)
+        col_map[used] = np.arange(len(used))
+
+        values = np.zeros((len(widgets), len(children)), dtype=np.int64)
+        present = np.zeros((len(widgets), len(children)), dtype=bool)
+        # 同一格重复时后写入的覆盖先写入的
+        values[rows[keep], col_map[cols[keep]]] = counts[keep]
+        present[rows[keep], col_map[cols[keep]]] = True
+
+        order = sorted(range(len(children)), key=children.__getitem__)
+        child_columns = [children[i] for i in order]
+        columns = {
+            "UserWidget": widgets,
+            "Instance Count": pd.array(np.frombuffer(self.instance_counts, dtype=np.int64), dtype="Int64"),
+        }
+        for name, i in zip(child_columns, order):
+            columns[name] = pd.arrays.IntegerArray(values[:, i].copy(), ~present[:, i])
+        return pd.DataFrame(columns, columns=["UserWidget", "Instance Count"] + child_columns)
+
+
+def parse_widget_lines(lines):
+    matrix = WidgetChildMatrix()
+    for kind, name, count, _ in iter_widget_records(lines):
+        if kind == RECORD_WIDGET:
+            matrix.add_widget(name, count)
+        elif kind == RECORD_CHILD:
+            matrix.add_child(name, count)
+        else:
+            matrix.end_block()
+    return matrix
+
+
+def parse_log_to_dataframe(file_path):
     with open(file_path, "r", encoding="utf-8") as f:
-        log_data = f.read()
-
-    widget_data = {}
-    current_widget = None
-
-    for line in log_data.split("\n"):
-        widget_match = re.match(r'.*====\s+(\w+_C):\s+(\d+)\s+====', line)
-        component_match = re.match(r'.*\s+(\w+):\s+(\d+)', line)
-
-        if widget_match:
-            current_widget = widget_match.group(1)
-            widget_data[current_widget] = {"Instance Count": int(widget_match.group(2))}
-        elif component_match and current_widget:
-            widget_data[current_widget][component_match.group(1)] = int(component_match.group(2))
-
-    all_columns = set()
-    for data in widget_data.values():
-        all_columns.update(data.keys())
-
-    all_columns = ["UserWidget"] + sorted(all_columns - {"Instance Count"})
-
-    rows = []
-    for widget, data in widget_data.items():
-        row = {col: data.get(col, "") for col in all_columns}  # 为空时使用空字符串
-        row["UserWidget"] = widget
-        row["Instance Count"] = data.get("Instance Count", "")
-        rows.append(row)
-
-    df = pd.DataFrame(rows, columns=["UserWidget", "Instance Count"] + sorted(all_columns[1:]))
-
-    output_path = os.path.splitext(file_path)[0] + ".xlsx"
-    df.to_excel(output_path, index=False, engine='openpyxl')
-
-    # 确保数字以数值格式存储
-    wb = load_workbook(output_path)
-    ws = wb.active
-    for col in range(2, ws.max_column + 1):  # 从第二列开始
-        for row in range(2, ws.max_row + 1):  # 从第二行开始
-            cell = ws.cell(row=row, column=col)
-            if isinstance(cell.value, str) and cell.value.isdigit():
-                cell.value = int(cell.value)
+        return parse_widget_lines(f).to_dataframe()
+
+
+class WidgetSnapshotStore:
+    """
+    多次 PrintUserWidgetChildrenNumber 打印的列式存储（快照 × 控件 × 子控件类型）。
+    每条记录只追加到几个紧凑数组，按快照统计时用 numpy 一次性聚合，不做 dict 合并。
+
+    快照边界：新日志文件开始、控件头的帧号变化、或同一控件在当前快照中再次出现。
+    """
+
+    def __init__(self):
+        self.widget_index = {}
+        self.child_index = {}
+        self.labels = []
+        # 控件头：快照、控件、实例数
+        self.widget_snaps = array("I")
+        self.widget_rows = array("I")
+        self.widget_counts = array("q")
+        # 子控件：快照、控件、子控件类型、数量
+        self.child_snaps = array("I")
+        self.child_rows = array("I")
+        self.child_cols = array("I")
+        self.child_counts = array("q")
+        self._source = None
+        self._source_snapshots = 0
+        self._current_widgets = set()
+        self._current_frame = None
+        self._current_row = None
+        self._current_row_frame = None
+        self._needs_new_snapshot = True
+
+    def begin_source(self, name):
+        self._source = name
+        self._source_snapshots = 0
+        self._needs_new_snapshot = True
+        self._current_row = None
+
+    def _start_snapshot(self, frame):
+        self._source_snapshots += 1
+        label = f"{self._source}#{self._source_snapshots}"
+        if frame is not None:
+            label += f"@{frame}"
+        self.labels.append(label)
+        self._current_widgets = set()
+        self._current_frame = frame
+        self._needs_new_snapshot = False
+
+    def add_widget(self, name, count, frame=None):
+        if (self._needs_new_snapshot or name in self._current_widgets
+                or (frame is not None and self._current_frame is not None and frame != self._current_frame)):
+            self._start_snapshot(frame)
+        self._current_widgets.add(name)
+        row = self.widget_index.setdefault(name, len(self.widget_index))
+        self.widget_snaps.append(len(self.labels) - 1)
+        self.widget_rows.append(row)
+        self.widget_counts.append(count)
+        self._current_row = row
+        self._current_row_frame = frame
+
+    def end_block(self):
+        """当前控件头的子控件行结束，之后的子控件行在下一个控件头之前都不计入"""
+        self._current_row = None
+
+    def add_child(self, name, count, frame=None):
+        if self._current_row is None:
+            return
+        # 子控件行与控件头不在同一帧，说明不是这次打印的输出
+        if frame is not None and self._current_row_frame is not None and frame != self._current_row_frame:
+            self._current_row = None
+            return
+        col = self.child_index.setdefault(name, len(self.child_index))
+        self.child_snaps.append(len(self.labels) - 1)
+        self.child_rows.append(self._current_row)
+        self.child_cols.append(col)
+        self.child_counts.append(count)
+
+    def instance_matrix(self):
+        """控件 × 快照的实例数，某次快照中没有出现的控件记为 0"""
+        matrix = np.zeros((len(self.widget_index), len(self.labels)), dtype=np.int64)
+        if len(self.widget_counts):
+            matrix[np.frombuffer(self.widget_rows, dtype=np.uint32),
+                   np.frombuffer(self.widget_snaps, dtype=np.uint32)] = np.frombuffer(self.widget_counts, dtype=np.int64)
+        return matrix
+
+    def child_total_matrix(self):
+        """控件 × 快照的子控件总数（所有子控件类型求和）"""
+        matrix = np.zeros((len(self.widget_index), len(self.labels)), dtype=np.int64)
+        if len(self.child_counts):
+            np.add.at(matrix,
+                      (np.frombuffer(self.child_rows, dtype=np.uint32), np.frombuffer(self.child_snaps, dtype=np.uint32)),
+                      np.frombuffer(self.child_counts, dtype=np.int64))
+        return matrix
+
+    def trend_sheets(self):
+        widgets = list(self.widget_index)
+        instances = self.instance_matrix()
+        children = self.child_total_matrix()
+
+        def matrix_frame(matrix):
+            df = pd.DataFrame(matrix, columns=self.labels)
+            df.insert(0, "UserWidget", widgets)
+            return df
+
+        if not self.labels:
+            instances = children = np.zeros((len(widgets), 1), dtype=np.int64)
+        growth = pd.DataFrame({
+            "UserWidget": widgets,
+            "First Instances": instances[:, 0],
+            "Last Instances": instances[:, -1],
+            "Peak Instances": instances.max(axis=1),
+            "Instance Growth": instances[:, -1] - instances[:, 0],
+            "First Children": children[:, 0],
+            "Last Children": children[:, -1],
+            "Children Growth": children[:, -1] - children[:, 0],
+            # 实例数在每次快照中都不减少且最终增长，疑似泄漏
+            "Monotonic": (np.diff(instances, axis=1) >= 0).all(axis=1) & (instances[:, -1] > instances[:, 0]),
+        }).sort_values(["Instance Growth", "Children Growth"], ascending=False)
+
+        return {
+            "Growth": growth,
+            "Instances": matrix_frame(self.instance_matrix()),
+            "Children": matrix_frame(self.child_total_matrix()),
+        }
+
+
+def parse_snapshots(file_paths):
+    store = WidgetSnapshotStore()
+    for file_path in file_paths:
+        store.begin_source(os.path.splitext(os.path.basename(file_path))[0])
+        with open(file_path, "r", encoding="utf-8") as f:
+            for kind, name, count, frame in iter_widget_records(f):
+                if kind == RECORD_WIDGET:
+                    store.add_widget(name, count, frame)
+                elif kind == RECORD_CHILD:
+                    store.add_child(name, count, frame)
+                else:
+                    store.end_block()
+    return store
+
+
+def write_xlsx(df, output_path):
+    """单次流式写出，数值直接以 int 写入，无需再打开文件转换类型"""
+    write_xlsx_sheets({"Sheet": df}, output_path)
+
+
+def write_xlsx_sheets(sheets, output_path):
+    wb = Workbook(write_only=True)
+    for title, df in sheets.items():
+        ws = wb.create_sheet(title)
+        ws.append(list(df.columns))
+        for row in df.itertuples(index=False, name=None):
+            ws.append([None if value is pd.NA else value for value in row])
     wb.save(output_path)
+
+
+def trend_logs_to_excel(file_paths, output_path=None):
+    store = parse_snapshots(file_paths)
+    output_path = output_path or os.path.splitext(file_paths[-1])[0] + "_trend.xlsx"
+    sheets = store.trend_sheets()
+    write_xlsx_sheets(sheets, output_path)
+
+    growers = sheets["Growth"]
+    growers = growers[growers["Instance Growth"] > 0].head(10)
+    print(f"共检测到 {len(store.labels)} 次快照，{len(store.widget_index)} 种 UserWidget")
+    for _, row in growers.iterrows():
+        print(f"  {row['UserWidget']}: 实例 {row['First Instances']} -> {row['Last Instances']}，"
+              f"子控件 {row['First Children']} -> {row['Last Children']}")
+    print(f"Excel 文件已生成: {output_path}")
+
+
+def parse_log_to_excel(file_path, output_path=None):
+    """file_path 为 '-' 时从标准输入读取"""
+    if file_path == "-":
+        df = parse_widget_lines(sys.stdin).to_dataframe()
+        output_path = output_path or "UserWidgetChildren.xlsx"
+    else:
+        df = parse_log_to_dataframe(file_path)
+        output_path = output_path or os.path.splitext(file_path)[0] + ".xlsx"
+    write_xlsx(df, output_path)
     print(f"Excel 文件已生成: {output_path}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("请提供日志文件路径作为参数")
-        sys.exit(1)
-    parse_log_to_excel(sys.argv[1])
+    parser = argparse.ArgumentParser(description="统计 PrintUserWidgetChildrenNumber 输出并生成 Excel")
+    parser.add_argument("log_file_paths", nargs="+", metavar="log_file_path",
+                        help="日志文件路径，'-' 表示从标准输入读取；多个日志只能与 --trend 一起使用")
+    parser.add_argument("--output", help="输出 xlsx 路径（默认与日志同名）")
+    parser.add_argument("--trend", action="store_true",
+                        help="把每次打印作为独立快照，输出各 UserWidget 实例数 / 子控件数的增长")
+    args = parser.parse_args()
+    if not args.trend and len(args.log_file_paths) > 1:
+        parser.error("多个日志文件需要 --trend；不加 --trend 时只处理一个日志")
+    if args.trend:
+        trend_logs_to_excel(args.log_file_paths, args.output)
+    else:
+        parse_log_to_excel(args.log_file_paths[0], args.output)
 
 
 """
@@ -0,0 +1,146 @@
+# BenchmarkProfiles.py
+# 用样本视频对比各编码配置的速度、体积和质量：编码 fps、输出码率、SSIM / PSNR（与按同样缩放后的源视频比较）。
+# 用法:
+#   python BenchmarkProfiles.py [video|dir ...] [--profiles default,fast,...] [--synthetic SECONDS]
+#                               [--max-kbps N] [--min-ssim X] [--report report.json]
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from VideoFormatEngine import ENCODING_PROFILES, VideoFormatEngine, discover_videos, last_error_line
+
+SSIM_REGEX = re.compile(r"SSIM .*All:([\d.]+)")
+PSNR_REGEX = re.compile(r"PSNR .*average:([\d.]+|inf)")
+# 与编码时相同的缩放和补边，参考视频与输出分辨率一致后再比较
+REFERENCE_FILTER = "scale=w=1920:h=1088:force_original_aspect_ratio=decrease,pad=ceil(iw/2)*2:ceil(ih/2)*2"
+
+
+def make_synthetic_video(ffmpeg_binary, path, seconds):
+    subprocess.run([ffmpeg_binary, '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc2=size=1280x720:rate=30',
+                    '-t', str(seconds), '-c:v', 'libx264', '-crf', '12', '-pix_fmt', 'yuv420p', path], check=True)
+
+
+def probe_output(ffprobe_binary, path):
+    """返回 (帧数, 时长秒数)"""
+    result = subprocess.run([ffprobe_binary, '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+                             '-show_entries', 'stream=nb_read_packets:format=duration', '-of', 'json', path],
+                            capture_output=True, check=True)
+    info = json.loads(result.stdout)
+    return int(info['streams'][0]['nb_read_packets']), float(info['format']['duration'])
+
+
+def measure_quality(ffmpeg_binary, output_path, reference_path):
+    """一次解码同时计算 SSIM 和 PSNR，返回 (ssim, psnr)"""
+    graph = (f"[0:v]split[a][b];[1:v]{REFERENCE_FILTER},format=yuv420p,split[r1][r2];"
+             f"[a][r1]ssim;[b][r2]psnr")
+    result = subprocess.run([ffmpeg_binary, '-hide_banner', '-i', output_path, '-i', reference_path,
+                             '-lavfi', graph, '-f', 'null', '-'], capture_output=True, encoding='utf-8',
+                            errors='ignore')
+    ssim = SSIM_REGEX.search(result.stderr)
+    psnr = PSNR_REGEX.search(result.stderr)
+    return (float(ssim.group(1)) if ssim else None,
+            float(psnr.group(1)) if psnr else None)
+
+
+def benchmark_profile(engine, samples, work_dir):
+    frames = 0
+    seconds = 0.0
+    media_seconds = 0.0
+    output_bytes = 0
+    ssim_values = []
+    psnr_values = []
+    for index, sample in enumerate(samples):
+        output_path = os.path.join(work_dir, f"{engine.profile}_{index}.mp4")
+        start = time.perf_counter()
+        success, err_msg = engine.process_video_ffmpeg_python(sample, output_path)
+        elapsed = time.perf_counter() - start
+        if not success:
+            raise RuntimeError(f"{engine.profile}: {sample}: {last_error_line(err_msg)}")
+        sample_frames, duration = probe_output(engine.ffprobe_binary, output_path)
+        ssim, psnr = measure_quality(engine.ffmpeg_binary, output_path, sample)
+        frames += sample_frames
+        seconds += elapsed
+        media_seconds += duration
+        output_bytes += os.path.getsize(output_path)
+        if ssim is not None:
+            ssim_values.append(ssim)
+        if psnr is not None:
+            psnr_values.append(psnr)
+        os.remove(output_path)
+
+    return {
+        "profile": engine.profile,
+        "settings": ENCODING_PROFILES[engine.profile],
+        "encode_seconds": round(seconds, 3),
+        "encode_fps": round(frames / seconds, 2) if seconds else None,
+        "output_bytes": output_bytes,
+        "bitrate_kbps": round(output_bytes * 8 / media_seconds / 1000, 1) if media_seconds else None,
+        "ssim": round(min(ssim_values), 5) if ssim_values else None,
+        "psnr": round(min(psnr_values), 2) if psnr_values else None,
+    }
+
+
+def pick_profile(results, max_kbps=None, min_ssim=None):
+    """满足码率上限和 SSIM 下限的配置中编码最快的一个"""
+    candidates = [r for r in results
+                  if (max_kbps is None or r["bitrate_kbps"] <= max_kbps)
+                  and (min_ssim is None or (r["ssim"] is not None and r["ssim"] >= min_ssim))]
+    return max(candidates, key=lambda r: r["encode_fps"])["profile"] if candidates else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare encoding profiles on speed, bitrate and SSIM/PSNR.")
+    parser.add_argument("samples", nargs="*", help="sample videos or directories (default: a synthetic clip)")
+    parser.add_argument("--profiles", default=",".join(ENCODING_PROFILES),
+                        help="comma separated profiles to compare (default: all)")
+    parser.add_argument("--synthetic", type=int, default=10, help="length of the synthetic clip in seconds")
+    parser.add_argument("--max-kbps", type=float, help="output bitrate budget used to pick a profile")
+    parser.add_argument("--min-ssim", type=float, help="lowest acceptable SSIM used to pick a profile")
+    parser.add_argument("--report", help="write the results as JSON to this file")
+    parser.add_argument("--ffmpeg", help="ffmpeg binary (default: bundled, then PATH)")
+    parser.add_argument("--ffprobe", help="ffprobe binary (default: bundled, then PATH)")
+    args = parser.parse_args(argv)
+
+    profiles = args.profiles.split(",")
+    unknown = [name for name in profiles if name not in ENCODING_PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    work_dir = tempfile.mkdtemp(prefix="benchmark_profiles_")
+    try:
+        engine = VideoFormatEngine(args.ffmpeg, args.ffprobe)
+        samples = [path for path, _ in discover_videos(args.samples)]
+        if not samples:
+            synthetic_path = os.path.join(work_dir, "synthetic.mp4")
+            make_synthetic_video(engine.ffmpeg_binary, synthetic_path, args.synthetic)
+            samples = [synthetic_path]
+
+        results = []
+        print(f"{'profile':<12} {'fps':>8} {'kbps':>10} {'ssim':>8} {'psnr':>7} {'seconds':>9}")
+        for name in profiles:
+            engine.profile = name
+            result = benchmark_profile(engine, samples, work_dir)
+            results.append(result)
+            print(f"{name:<12} {result['encode_fps']:>8} {result['bitrate_kbps']:>10} "
+                  f"{result['ssim']!s:>8} {result['psnr']!s:>7} {result['encode_seconds']:>9}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    best = pick_profile(results, args.max_kbps, args.min_ssim)
+    if args.max_kbps is not None or args.min_ssim is not None:
+        print(f"Fastest profile within budget: {best or 'none'}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fp:
+            json.dump({"samples": samples, "profiles": results, "recommended": best}, fp, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
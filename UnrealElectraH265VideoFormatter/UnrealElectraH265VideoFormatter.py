@@ -1,20 +1,27 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import os
-import sys
 import threading
-import subprocess
-import ffmpeg  # pip install ffmpeg-python
+
+from VideoFormatEngine import (CPU_COUNT, DEFAULT_JOBS, DEFAULT_PROFILE, ENCODING_PROFILES, SEGMENT_MIN_DURATION,
+                               BatchStatus, VideoFormatEngine, discover_videos, last_error_line)
+
+# 界面刷新进度的间隔
+PROGRESS_INTERVAL_MS = 500
+
+MODE_TEXT = {'skipped': "已是最新，跳过", 'remux': "仅重新封装", 'segment': "分段并行编码"}
 
 
 class VideoCompressorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Unreal H.265 视频格式化工具")
-        self.root.geometry("600x550")
+        self.root.geometry("700x600")
 
-        # 获取内置 ffmpeg 路径
-        self.ffmpeg_binary = self.resource_path("ffmpeg.exe")
+        # 编码引擎，优先使用内置 ffmpeg / ffprobe
+        self.engine = VideoFormatEngine()
+        self.status = BatchStatus()
+        self.processing = False
 
         # 1. Tips 区域
         self.setup_tips_area()
@@ -31,21 +38,35 @@ class VideoCompressorApp:
                                     width=20, bg="#fff3e0")
         self.btn_folder.pack(side=tk.LEFT, padx=20)
 
+        # 并行任务数
+        jobs_frame = tk.Frame(root)
+        jobs_frame.pack()
+        tk.Label(jobs_frame, text=f"并行任务数 (CPU {CPU_COUNT} 核):").pack(side=tk.LEFT)
+        self.jobs_var = tk.IntVar(value=DEFAULT_JOBS)
+        tk.Spinbox(jobs_frame, from_=1, to=CPU_COUNT, width=5, textvariable=self.jobs_var).pack(side=tk.LEFT)
+        tk.Label(jobs_frame, text="编码配置:").pack(side=tk.LEFT, padx=(10, 0))
+        self.profile_var = tk.StringVar(value=DEFAULT_PROFILE)
+        tk.OptionMenu(jobs_frame, self.profile_var, *sorted(ENCODING_PROFILES)).pack(side=tk.LEFT)
+        self.segment_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(jobs_frame, text=f"长视频分段并行编码 (>{SEGMENT_MIN_DURATION // 60} 分钟)",
+                       variable=self.segment_var).pack(side=tk.LEFT, padx=10)
+
+        # 编码进度（每个任务的百分比、fps、速度和批次预计剩余时间）
+        self.progress_var = tk.StringVar()
+        tk.Label(root, textvariable=self.progress_var, justify=tk.LEFT, anchor=tk.W,
+                 font=("Consolas", 9)).pack(fill=tk.X, padx=10)
+
         # 3. 日志输出区域
         tk.Label(root, text="处理日志:").pack(anchor=tk.W, padx=10)
         self.log_text = scrolledtext.ScrolledText(root, height=15, state='disabled')
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
         # 检查环境
-        if not os.path.exists(self.ffmpeg_binary):
+        if not os.path.exists(self.engine.ffmpeg_binary):
             self.log(
-                f"⚠️ 警告：未找到内置 FFmpeg 引擎。\n路径: {self.ffmpeg_binary}\n如果是开发运行，请确保 ffmpeg.exe 在脚本同级目录。")
-
-    def resource_path(self, relative_path):
-        """ 获取资源绝对路径 """
-        if hasattr(sys, '_MEIPASS'):
-            return os.path.join(sys._MEIPASS, relative_path)
-        return os.path.join(os.path.abspath("."), relative_path)
+                f"⚠️ 警告：未找到内置 FFmpeg 引擎。\n路径: {self.engine.ffmpeg_binary}\n如果是开发运行，请确保 ffmpeg.exe 在脚本同级目录。")
+        if not os.path.exists(self.engine.ffprobe_binary):
+            self.log(f"⚠️ 警告：未找到 ffprobe，所有文件都将重新编码。\n路径: {self.engine.ffprobe_binary}")
 
     def setup_tips_area(self):
         tip_frame = tk.LabelFrame(self.root, text="规则说明", padx=10, pady=10, fg="blue")
@@ -65,101 +86,56 @@ class VideoCompressorApp:
         self.log_text.see(tk.END)
         self.log_text.config(state='disabled')
 
-    def process_video_ffmpeg_python(self, input_path, output_path):
-        try:
-            stream = ffmpeg.input(input_path)
-            stream = ffmpeg.filter(stream, 'scale', w=1920, h=1088, force_original_aspect_ratio='decrease')
-            stream = ffmpeg.filter(stream, 'pad', 'ceil(iw/2)*2', 'ceil(ih/2)*2')
-
-            output_kwargs = {
-                'vcodec': 'libx265',
-                'pix_fmt': 'yuv420p',
-                'x265-params': 'repeat-headers=1:aud=0:info=0:sei=0',
-                'tag:v': 'hvc1',
-                'movflags': '+faststart'
-            }
-            stream = ffmpeg.output(stream, output_path, **output_kwargs)
-
-            cmd_args = ffmpeg.compile(stream, cmd=self.ffmpeg_binary, overwrite_output=True)
-
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                # SW_HIDE = 0，强制隐藏窗口
-                startupinfo.wShowWindow = 0
-
-            process = subprocess.Popen(
-                cmd_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE,  # 防止 ffmpeg 等待输入
-                startupinfo=startupinfo,  # <--- 这里传入隐藏配置
-                encoding='utf-8',  # 自动解码
-                errors='ignore'  # 忽略解码错误
-            )
-
-            # 等待执行完成
-            stdout, stderr = process.communicate()
-
-            if process.returncode == 0:
-                return True, None
-            else:
-                # 失败，返回 stderr
-                return False, stderr
-
-        except ffmpeg.Error as e:
-            # compile 阶段出错
-            return False, str(e)
-        except Exception as e:
-            # subprocess 阶段出错
-            return False, str(e)
-
-    def process_thread(self, files_to_process):
-        self.btn_file.config(state='disabled')
-        self.btn_folder.config(state='disabled')
-
-        success_count = 0
-        total = len(files_to_process)
-
-        for idx, file_path in enumerate(files_to_process):
-            directory, filename = os.path.split(file_path)
-            name, ext = os.path.splitext(filename)
-
-            output_dir = os.path.join(directory, "Output")
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-
-            output_path = os.path.join(output_dir, f"{filename}")
-            if not output_path.lower().endswith(('.mp4', '.mov', '.mkv')):
-                output_path = os.path.join(output_dir, f"{name}.mp4")
-
-            self.log(f"[{idx + 1}/{total}] 处理中: {filename}")
-            # 更新界面 UI，防止看起来像卡死
-            self.root.update_idletasks()
-
-            success, err_msg = self.process_video_ffmpeg_python(file_path, output_path)
-
-            if success:
-                self.log(f"   ---> ✅ 成功")
-                success_count += 1
-            else:
-                self.log(f"   ---> ❌ 失败")
-                if err_msg:
-                    # 只显示最后一行关键报错，避免刷屏
-                    last_line = err_msg.strip().splitlines()[-1] if err_msg else "Unknown"
-                    self.log(f"   [Error]: {last_line}")
+    def process_thread(self, files_to_process, jobs, segment_long=False):
+        self.root.after(0, self.set_buttons_state, 'disabled')
+
+        items = [(path, self.engine.output_path_for(path, base_dir=base_dir)) for path, base_dir in files_to_process]
+        self.root.after(0, self.log, f"共 {len(items)} 个文件，{jobs} 个任务并行处理中...")
+        results = self.engine.run_batch(items, jobs, segment_long, self.status, self.on_result)
+
+        success_count = sum(1 for result in results if result["success"])
+        self.root.after(0, self.finish_processing, success_count, len(results))
+
+    def on_result(self, done, total, result):
+        filename = os.path.basename(result["input"])
+        if result["success"]:
+            mode_text = MODE_TEXT.get(result["mode"], "重新编码")
+            self.root.after(0, self.log, f"[{done}/{total}] ✅ 成功({mode_text}): {filename}")
+        else:
+            self.root.after(0, self.log, f"[{done}/{total}] ❌ 失败: {filename}")
+            if result["error"]:
+                self.root.after(0, self.log, f"   [Error]: {last_error_line(result['error'])}")
+
+    def poll_progress(self):
+        if not self.processing:
+            self.progress_var.set("")
+            return
+        if self.status.running:
+            self.progress_var.set("\n".join(self.status.lines()))
+        self.root.after(PROGRESS_INTERVAL_MS, self.poll_progress)
+
+    def set_buttons_state(self, state):
+        self.btn_file.config(state=state)
+        self.btn_folder.config(state=state)
 
+    def finish_processing(self, success_count, total):
+        self.processing = False
         self.log(f"\n✅ 全部任务结束。成功: {success_count} / 总计: {total}")
         messagebox.showinfo("完成", f"处理完成！\n成功: {success_count} 个文件")
-
-        self.btn_file.config(state='normal')
-        self.btn_folder.config(state='normal')
+        self.set_buttons_state('normal')
 
     def start_processing(self, files):
         if not files:
             return
-        t = threading.Thread(target=self.process_thread, args=(files,))
+        try:
+            jobs = self.jobs_var.get()
+        except tk.TclError:
+            jobs = DEFAULT_JOBS
+        self.engine.profile = self.profile_var.get()
+        self.status = BatchStatus()
+        self.processing = True
+        self.poll_progress()
+        t = threading.Thread(target=self.process_thread, args=(files, jobs, self.segment_var.get()))
         t.start()
 
     def select_file(self):
@@ -168,16 +144,13 @@ class VideoCompressorApp:
             filetypes=[("Video Files", "*.mp4 *.mov *.avi *.mkv *.flv *.wmv"), ("All Files", "*.*")]
         )
         if file_path:
-            self.start_processing([file_path])
+            self.start_processing([(file_path, os.path.dirname(file_path))])
 
     def select_folder(self):
         folder_path = filedialog.askdirectory(title="选择包含视频的文件夹")
         if folder_path:
-            video_extensions = ('.mp4', '.mov', '.avi', '.mkv', '.flv', '.wmv')
-            files = []
-            for f in os.listdir(folder_path):
-                if f.lower().endswith(video_extensions):
-                    files.append(os.path.join(folder_path, f))
+            # 递归查找子目录，各目录的输出写入其中的 Output 目录
+            files = discover_videos([folder_path])
 
             if not files:
                 self.log("⚠️ 选定文件夹中未找到视频文件。")
@@ -0,0 +1,130 @@
+# VerifySegmentedEncode.py
+# 检查分段并行编码的拼接结果与整段编码在码流参数上完全一致：
+# 输出中的全部流，ffprobe 报告的视频流参数、帧数，以及码流中出现的全部 VPS / SPS / PPS 字节。
+# 用法:
+#   python VerifySegmentedEncode.py [video] [--synthetic SECONDS] [--segment-seconds N]
+#                                   [--ffmpeg PATH] [--ffprobe PATH]
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import VideoFormatEngine as formatter
+
+# 需要一致的流参数
+STREAM_FIELDS = (
+    'codec_name', 'codec_tag_string', 'profile', 'level', 'pix_fmt', 'width', 'height',
+    'sample_aspect_ratio', 'color_range', 'color_space', 'color_transfer', 'color_primaries',
+    'r_frame_rate', 'refs',
+)
+# HEVC NAL 类型：VPS / SPS / PPS
+PARAMETER_SET_TYPES = {32: 'VPS', 33: 'SPS', 34: 'PPS'}
+
+
+def make_synthetic_video(ffmpeg_binary, path, seconds):
+    subprocess.run([ffmpeg_binary, '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc2=size=1280x720:rate=30',
+                    '-f', 'lavfi', '-i', 'sine=frequency=440', '-t', str(seconds),
+                    '-c:v', 'libx264', '-g', '60', '-pix_fmt', 'yuv420p', '-c:a', 'aac', path], check=True)
+
+
+def video_stream_info(ffprobe_binary, path):
+    result = subprocess.run([ffprobe_binary, '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+                             '-show_streams', '-of', 'json', path], capture_output=True, check=True)
+    stream = json.loads(result.stdout)['streams'][0]
+    info = {field: stream.get(field) for field in STREAM_FIELDS}
+    info['nb_read_packets'] = stream.get('nb_read_packets')
+    return info
+
+
+def stream_list(ffprobe_binary, path):
+    """输出中全部流的 (类型, 编码)，用于发现多出或缺少的音频、字幕流"""
+    result = subprocess.run([ffprobe_binary, '-v', 'error', '-show_entries', 'stream=codec_type,codec_name',
+                             '-of', 'json', path], capture_output=True, check=True)
+    return [(stream.get('codec_type'), stream.get('codec_name')) for stream in json.loads(result.stdout)['streams']]
+
+
+def parameter_sets(ffmpeg_binary, path):
+    """以 Annex B 导出视频流，返回其中出现过的所有参数集 {(类型, 字节)}"""
+    result = subprocess.run([ffmpeg_binary, '-v', 'error', '-i', path, '-map', '0:v:0', '-c', 'copy',
+                             '-bsf:v', 'hevc_mp4toannexb', '-f', 'hevc', 'pipe:1'], capture_output=True, check=True)
+    data = result.stdout
+    found = set()
+    starts = []
+    pos = data.find(b'\x00\x00\x01')
+    while pos != -1:
+        starts.append(pos + 3)
+        pos = data.find(b'\x00\x00\x01', pos + 3)
+    for index, start in enumerate(starts):
+        end = starts[index + 1] - 3 if index + 1 < len(starts) else len(data)
+        nal = data[start:end].rstrip(b'\x00')
+        nal_type = (nal[0] >> 1) & 0x3F if nal else None
+        if nal_type in PARAMETER_SET_TYPES:
+            found.add((PARAMETER_SET_TYPES[nal_type], nal))
+    return found
+
+
+def verify(engine, input_path, work_dir):
+    serial_path = os.path.join(work_dir, "serial.mp4")
+    segmented_path = os.path.join(work_dir, "segmented.mp4")
+
+    success, err_msg = engine.process_video_ffmpeg_python(input_path, serial_path)
+    if not success:
+        print(f"整段编码失败: {err_msg}")
+        return False
+    success, err_msg = engine.process_video_segmented(input_path, segmented_path)
+    if not success:
+        print(f"分段编码失败: {err_msg}")
+        return False
+
+    serial_streams = stream_list(engine.ffprobe_binary, serial_path)
+    segmented_streams = stream_list(engine.ffprobe_binary, segmented_path)
+    ok = serial_streams == segmented_streams
+    print(f"{'OK  ' if ok else 'DIFF'} {'streams':<20} {serial_streams!s:<12} {segmented_streams}")
+
+    serial_info = video_stream_info(engine.ffprobe_binary, serial_path)
+    segmented_info = video_stream_info(engine.ffprobe_binary, segmented_path)
+    for field in STREAM_FIELDS + ('nb_read_packets',):
+        same = serial_info[field] == segmented_info[field]
+        ok &= same
+        print(f"{'OK  ' if same else 'DIFF'} {field:<20} {serial_info[field]!s:<12} {segmented_info[field]}")
+
+    serial_sets = parameter_sets(engine.ffmpeg_binary, serial_path)
+    segmented_sets = parameter_sets(engine.ffmpeg_binary, segmented_path)
+    same = serial_sets == segmented_sets
+    ok &= same
+    kinds = ", ".join(sorted(kind for kind, _ in serial_sets))
+    print(f"{'OK  ' if same else 'DIFF'} {'parameter sets':<20} {kinds}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that segment-parallel encoding matches a serial encode.")
+    parser.add_argument("video", nargs="?", help="input video (default: a synthetic clip)")
+    parser.add_argument("--synthetic", type=int, default=20, help="length of the synthetic clip in seconds")
+    parser.add_argument("--segment-seconds", type=int, default=5, help="segment length used for the check")
+    parser.add_argument("--ffmpeg", help="ffmpeg binary (default: bundled, then PATH)")
+    parser.add_argument("--ffprobe", help="ffprobe binary (default: bundled, then PATH)")
+    args = parser.parse_args(argv)
+
+    formatter.SEGMENT_SECONDS = args.segment_seconds
+    engine = formatter.VideoFormatEngine(args.ffmpeg, args.ffprobe)
+
+    work_dir = tempfile.mkdtemp(prefix="verify_segments_")
+    try:
+        input_path = args.video
+        if not input_path:
+            input_path = os.path.join(work_dir, "synthetic.mp4")
+            make_synthetic_video(engine.ffmpeg_binary, input_path, args.synthetic)
+        ok = verify(engine, input_path, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print("一致" if ok else "不一致")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,711 @@
+# VideoFormatEngine.py
+# UnrealElectraH265VideoFormatter 的编码引擎，不依赖 Tk，可在构建机上无界面运行。
+# 用法:
+#   python VideoFormatEngine.py <dir|file> [...] [--output-root DIR] [--jobs N] [--profile NAME] [--no-segment]
+#                               [--report report.json] [--ffmpeg PATH] [--ffprobe PATH]
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import shutil
+import tempfile
+import subprocess
+from collections import deque
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import ffmpeg  # pip install ffmpeg-python
+
+CPU_COUNT = os.cpu_count() or 1
+# 单个 libx265 进程编码 1080p 时大约只能用满 8 个核心，多出的核心分给并行任务
+THREADS_PER_JOB = 8
+DEFAULT_JOBS = max(1, CPU_COUNT // THREADS_PER_JOB)
+
+
+def x265_thread_params(jobs, threads=None):
+    """按并行任务数平分 CPU（或使用指定线程数）：pools 限制线程池大小，frame-threads 参照 x265 按核心数的默认值"""
+    threads = threads or max(1, CPU_COUNT // jobs)
+    if threads >= 32:
+        frame_threads = 6
+    elif threads >= 16:
+        frame_threads = 5
+    elif threads >= 8:
+        frame_threads = 3
+    elif threads >= 4:
+        frame_threads = 2
+    else:
+        frame_threads = 1
+    return f"pools={threads}:frame-threads={frame_threads}"
+
+
+# 编码配置：preset / crf / tune 为 libx265 参数，None 表示使用 libx265 默认值（medium、crf 28）；
+# threads 为每个任务的 x265 线程池大小，None 表示按并行任务数平分 CPU。
+# default 与最初的硬编码参数完全相同，已有输出的缓存不会失效。
+ENCODING_PROFILES = {
+    'default': {'preset': None, 'crf': None, 'tune': None, 'threads': None},
+    'draft': {'preset': 'ultrafast', 'crf': 30, 'tune': None, 'threads': None},
+    'fast': {'preset': 'fast', 'crf': 28, 'tune': None, 'threads': None},
+    'faster': {'preset': 'faster', 'crf': 28, 'tune': None, 'threads': None},
+    'quality': {'preset': 'slow', 'crf': 24, 'tune': None, 'threads': None},
+    'fastdecode': {'preset': 'medium', 'crf': 28, 'tune': 'fastdecode', 'threads': None},
+}
+DEFAULT_PROFILE = 'default'
+
+
+# 失败时用于报错的 stderr 行数
+STDERR_TAIL_LINES = 20
+DURATION_REGEX = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def run_ffmpeg(cmd_args, on_progress=None):
+    """
+    加上 -progress pipe:1 运行 ffmpeg，逐块读取进度并回调 on_progress(百分比, fps, 速度)，
+    时长未知时百分比为 None。stderr 在单独的线程中读取，只保留最后 STDERR_TAIL_LINES 行。
+    返回 (returncode, stderr 尾部)。
+    """
+    cmd_args = [cmd_args[0], '-hide_banner', '-progress', 'pipe:1', '-nostats'] + list(cmd_args[1:])
+
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        # SW_HIDE = 0，强制隐藏窗口
+        startupinfo.wShowWindow = 0
+
+    process = subprocess.Popen(
+        cmd_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,  # 防止 ffmpeg 等待输入
+        startupinfo=startupinfo,
+        encoding='utf-8',  # 自动解码
+        errors='ignore'  # 忽略解码错误
+    )
+
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    duration = []
+
+    def read_stderr():
+        for line in process.stderr:
+            if not duration:
+                match = DURATION_REGEX.search(line)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    duration.append(int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+            stderr_tail.append(line.rstrip())
+
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    stderr_thread.start()
+
+    block = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        block[key] = value
+        if key != 'progress':
+            continue
+        if on_progress is not None:
+            out_time_us = block.get('out_time_us') or block.get('out_time_ms') or ''
+            percent = None
+            if duration and duration[0] > 0 and out_time_us.isdigit():
+                percent = min(100.0, int(out_time_us) / 1e6 / duration[0] * 100)
+            try:
+                fps = float(block.get('fps', 0))
+            except ValueError:
+                fps = 0.0
+            on_progress(percent, fps, block.get('speed', 'N/A').strip())
+        block = {}
+
+    process.wait()
+    stderr_thread.join()
+    return process.returncode, "\n".join(stderr_tail)
+
+
+# Electra 播放器要求：HEVC、yuv420p、宽高为偶数且不超过 1920x1088、mp4 中使用 hvc1 标签
+ELECTRA_MAX_WIDTH = 1920
+ELECTRA_MAX_HEIGHT = 1088
+
+
+def analyze_probe(probe):
+    """
+    根据 ffprobe 结果判断处理方式：返回 ('remux', 说明) 或 ('encode', 原因)。
+    视频流已符合要求时只需重新封装（加 hvc1 标签和 faststart），不解码。
+    """
+    streams = probe.get('streams', [])
+    video_streams = [st for st in streams
+                     if st.get('codec_type') == 'video' and not st.get('disposition', {}).get('attached_pic')]
+    if len(video_streams) != 1:
+        return 'encode', f"视频流数量为 {len(video_streams)}"
+    video = video_streams[0]
+    width, height = video.get('width', 0), video.get('height', 0)
+    if video.get('codec_name') != 'hevc':
+        return 'encode', f"编码为 {video.get('codec_name')}"
+    if video.get('pix_fmt') != 'yuv420p':
+        return 'encode', f"像素格式为 {video.get('pix_fmt')}"
+    if width > ELECTRA_MAX_WIDTH or height > ELECTRA_MAX_HEIGHT:
+        return 'encode', f"分辨率 {width}x{height} 超出限制"
+    if width % 2 or height % 2:
+        return 'encode', f"分辨率 {width}x{height} 不是偶数"
+    return 'remux', "视频流已符合要求"
+
+
+# 超过 SEGMENT_MIN_DURATION 秒的视频按关键帧切成约 SEGMENT_SECONDS 秒的片段并行编码，再无损拼接
+SEGMENT_SECONDS = 60
+SEGMENT_MIN_DURATION = 3 * SEGMENT_SECONDS
+
+
+class BatchSlots:
+    """
+    批处理的并行槽位，每个槽位对应一个任务的 x265 线程数（CPU / jobs）。
+    每个未完成的文件（包括排队中的）占一个槽位；长视频开始编码时只能借用此刻空闲的槽位来分段并行，
+    所有 x265 进程的线程总数不会超过 jobs 个槽位。
+    """
+
+    def __init__(self, jobs, reserved):
+        self.jobs = jobs
+        self.reserved = reserved
+        self.lock = threading.Lock()
+
+    def borrow(self):
+        """借出全部空闲槽位，返回借到的数量"""
+        with self.lock:
+            extra = max(0, self.jobs - self.reserved)
+            self.reserved += extra
+            return extra
+
+    def release(self, count):
+        with self.lock:
+            self.reserved -= count
+
+
+def concat_list_line(path):
+    """concat demuxer 列表中的一行，单引号需要转义"""
+    return "file '" + os.path.abspath(path).replace("'", "'\\''") + "'\n"
+
+
+# Output 目录中记录已编码文件的 sidecar 清单
+ENCODE_CACHE_NAME = ".encode_cache.json"
+
+
+class EncodeCache:
+    """
+    每个 Output 目录一份清单，按输出文件名记录源文件的大小 + mtime、编码参数摘要和输出大小。
+    三者都未变且输出文件仍在时跳过编码。多个编码任务共用，读写都加锁。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.manifests = {}
+
+    def _manifest(self, output_dir):
+        if output_dir not in self.manifests:
+            try:
+                with open(os.path.join(output_dir, ENCODE_CACHE_NAME), encoding='utf-8') as f:
+                    self.manifests[output_dir] = json.load(f)
+            except (OSError, ValueError):
+                self.manifests[output_dir] = {}
+        return self.manifests[output_dir]
+
+    @staticmethod
+    def source_stat(input_path):
+        st = os.stat(input_path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def is_up_to_date(self, input_path, output_path, settings):
+        output_dir, output_name = os.path.split(output_path)
+        with self.lock:
+            entry = self._manifest(output_dir).get(output_name)
+        if entry is None or entry.get("settings") != settings:
+            return False
+        try:
+            return entry.get("source") == os.path.basename(input_path) and \
+                entry.get("source_stat") == self.source_stat(input_path) and \
+                entry.get("output_size") == os.path.getsize(output_path)
+        except OSError:
+            return False
+
+    def record(self, input_path, output_path, settings):
+        output_dir, output_name = os.path.split(output_path)
+        entry = {
+            "source": os.path.basename(input_path),
+            "source_stat": self.source_stat(input_path),
+            "settings": settings,
+            "output_size": os.path.getsize(output_path),
+        }
+        with self.lock:
+            manifest = self._manifest(output_dir)
+            manifest[output_name] = entry
+            # 每个文件完成后立即写回，批处理中断时已完成的文件也不会重复编码
+            tmp_path = os.path.join(output_dir, ENCODE_CACHE_NAME + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, os.path.join(output_dir, ENCODE_CACHE_NAME))
+
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.flv', '.wmv')
+OUTPUT_DIR_NAME = "Output"
+
+
+def resource_path(relative_path):
+    """ 获取资源绝对路径 """
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return os.path.join(os.path.abspath("."), relative_path)
+
+
+def default_binary(name):
+    """优先使用打包在程序旁的 ffmpeg / ffprobe，其次使用 PATH 中的"""
+    bundled = resource_path(name + ".exe" if os.name == 'nt' else name)
+    if os.path.exists(bundled):
+        return bundled
+    return shutil.which(name) or bundled
+
+
+def discover_videos(inputs, skip_dirs=()):
+    """
+    递归查找视频文件，返回 [(文件路径, 所属输入目录)]。
+    跳过 Output 目录、以 . 开头的目录（分段编码的临时目录）和 skip_dirs（如位于输入目录内的 --output-root），
+    避免把上次的输出当作输入。
+    """
+    found = []
+    seen = set()
+    skip_keys = {os.path.normcase(os.path.abspath(path)) for path in skip_dirs}
+
+    def add(path, base_dir):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            found.append((path, base_dir))
+
+    def scan(directory, base_dir):
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name != OUTPUT_DIR_NAME and not entry.name.startswith('.') and \
+                        os.path.normcase(os.path.abspath(entry.path)) not in skip_keys:
+                    scan(entry.path, base_dir)
+            elif entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                add(entry.path, base_dir)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            scan(item, item)
+        elif os.path.isfile(item):
+            add(item, os.path.dirname(item))
+    return found
+
+
+class BatchStatus:
+    """编码线程只记录最新进度，界面或命令行按需读取"""
+
+    def __init__(self, total=0):
+        self.active = {}
+        self.done = 0
+        self.total = total
+        self.start_time = time.perf_counter()
+        self.running = False
+
+    def update(self, file_path, percent, fps, speed):
+        self.active[file_path] = (percent, fps, speed)
+
+    def finish_file(self, file_path):
+        self.active.pop(file_path, None)
+        self.done += 1
+
+    def lines(self):
+        """批次进度、已用时间、预计剩余时间，以及每个进行中任务的百分比、fps、速度"""
+        active = list(self.active.items())
+        finished = self.done + sum((percent or 0) / 100 for _, (percent, _, _) in active)
+        fraction = finished / self.total if self.total else 1.0
+        elapsed = time.perf_counter() - self.start_time
+        eta = format_seconds(elapsed * (1 - fraction) / fraction) if fraction > 0 else "--:--:--"
+
+        lines = [f"批次进度 {fraction * 100:.1f}%  已用 {format_seconds(elapsed)}  预计剩余 {eta}"]
+        for file_path, (percent, fps, speed) in active:
+            percent_text = f"{percent:5.1f}%" if percent is not None else "  ?  "
+            lines.append(f"{percent_text}  {fps:6.1f} fps  {speed:>6}  {os.path.basename(file_path)}")
+        return lines
+
+
+def find_output_conflicts(items):
+    """
+    返回 {输入路径: 先占用同一输出路径的输入路径}。例如同目录的 a.avi 和 a.mp4 都输出为 Output/a.mp4，
+    并行写同一个文件会互相覆盖，只保留第一个。
+    """
+    claimed = {}
+    conflicts = {}
+    for file_path, output_path in items:
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in claimed:
+            conflicts[file_path] = claimed[key]
+        else:
+            claimed[key] = file_path
+    return conflicts
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def make_result(input_path, output_path, mode, success, error=None, seconds=0.0):
+    input_size = file_size(input_path)
+    output_size = file_size(output_path) if success else None
+    return {
+        "input": input_path,
+        "output": output_path,
+        "mode": mode,
+        "success": success,
+        "error": error,
+        "seconds": round(seconds, 3),
+        "input_size": input_size,
+        "output_size": output_size,
+        "compression_ratio": round(output_size / input_size, 4) if input_size and output_size else None,
+    }
+
+
+def build_report(results, wall_seconds):
+    input_bytes = sum(r["input_size"] or 0 for r in results if r["success"])
+    output_bytes = sum(r["output_size"] or 0 for r in results if r["success"])
+    return {
+        "files": results,
+        "file_count": len(results),
+        "success_count": sum(1 for r in results if r["success"]),
+        "failed_count": sum(1 for r in results if not r["success"]),
+        "skipped_count": sum(1 for r in results if r["mode"] == 'skipped'),
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "compression_ratio": round(output_bytes / input_bytes, 4) if input_bytes else None,
+        "wall_seconds": round(wall_seconds, 3),
+    }
+
+
+class VideoFormatEngine:
+    def __init__(self, ffmpeg_binary=None, ffprobe_binary=None, profile=DEFAULT_PROFILE):
+        self.ffmpeg_binary = ffmpeg_binary or default_binary("ffmpeg")
+        self.ffprobe_binary = ffprobe_binary or default_binary("ffprobe")
+        if profile not in ENCODING_PROFILES:
+            raise ValueError(f"unknown encoding profile: {profile}")
+        self.profile = profile
+
+    def build_ffmpeg_args(self, input_path, output_path, jobs=1, include_threads=True):
+        profile = ENCODING_PROFILES[self.profile]
+        stream = ffmpeg.input(input_path)
+        stream = ffmpeg.filter(stream, 'scale', w=1920, h=1088, force_original_aspect_ratio='decrease')
+        stream = ffmpeg.filter(stream, 'pad', 'ceil(iw/2)*2', 'ceil(ih/2)*2')
+
+        x265_params = 'repeat-headers=1:aud=0:info=0:sei=0'
+        if include_threads and (jobs > 1 or profile['threads']):
+            x265_params += ':' + x265_thread_params(jobs, profile['threads'])
+
+        output_kwargs = {
+            'vcodec': 'libx265',
+            'pix_fmt': 'yuv420p',
+            'x265-params': x265_params,
+            'tag:v': 'hvc1',
+            'movflags': '+faststart'
+        }
+        for option in ('preset', 'crf', 'tune'):
+            if profile[option] is not None:
+                output_kwargs[option] = profile[option]
+        stream = ffmpeg.output(stream, output_path, **output_kwargs)
+
+        return ffmpeg.compile(stream, cmd=self.ffmpeg_binary, overwrite_output=True)
+
+    def encode_settings(self):
+        """
+        编码参数摘要：输入输出路径替换为占位符。线程参数（pools / frame-threads）只影响速度，
+        不计入摘要，调整并行任务数或配置中的线程数不会使已有输出失效。
+        """
+        cmd_args = self.build_ffmpeg_args("{input}", "{output}", include_threads=False)
+        return hashlib.sha1(json.dumps(cmd_args[1:]).encode('utf-8')).hexdigest()
+
+    def build_remux_args(self, input_path, output_path):
+        """视频流直接复制，只补 hvc1 标签和 faststart；与重新编码一样只输出视频，不带音频和字幕"""
+        output_kwargs = {
+            'vcodec': 'copy',
+            'tag:v': 'hvc1',
+            'movflags': '+faststart'
+        }
+        stream = ffmpeg.output(ffmpeg.input(input_path)['v:0'], output_path, **output_kwargs)
+        return ffmpeg.compile(stream, cmd=self.ffmpeg_binary, overwrite_output=True)
+
+    def probe_video(self, input_path):
+        """
+        返回 (处理方式, 详情, 时长秒数)：('remux', 说明, ...) 或 ('encode', 原因, ...)；
+        ffprobe 不可用或失败时重新编码，时长为 None。
+        """
+        if not os.path.exists(self.ffprobe_binary):
+            return 'encode', "未找到 ffprobe", None
+        try:
+            probe = ffmpeg.probe(input_path, cmd=self.ffprobe_binary)
+        except ffmpeg.Error as e:
+            return 'encode', f"ffprobe 失败: {e}", None
+        try:
+            duration = float(probe.get('format', {}).get('duration'))
+        except (TypeError, ValueError):
+            duration = None
+        return analyze_probe(probe) + (duration,)
+
+    def process_video(self, input_path, output_path, jobs=1, on_progress=None, segment_long=False, slots=None):
+        """
+        先用 ffprobe 分析，符合要求的文件只重新封装；segment_long 为 True 且 slots 中有空闲槽位时长视频分段并行编码，
+        没有空闲槽位（批次中还有其它文件在排队或编码）时与普通文件一样整段编码。
+        返回 (是否成功, 错误信息, 处理方式)，处理方式为 'remux' / 'encode' / 'segment'。
+        """
+        mode, detail, duration = self.probe_video(input_path)
+        if mode == 'encode' and segment_long and slots is not None and duration and duration >= SEGMENT_MIN_DURATION:
+            extra = slots.borrow()
+            if extra:
+                try:
+                    success, err_msg = self.process_video_segmented(input_path, output_path, on_progress,
+                                                                    extra + 1, slots.jobs)
+                finally:
+                    slots.release(extra)
+                return success, err_msg, 'segment'
+        if mode == 'remux':
+            try:
+                returncode, stderr_tail = run_ffmpeg(self.build_remux_args(input_path, output_path), on_progress)
+            except Exception as e:
+                return False, str(e), mode
+            return returncode == 0, (None if returncode == 0 else stderr_tail), mode
+        success, err_msg = self.process_video_ffmpeg_python(input_path, output_path, jobs, on_progress)
+        return success, err_msg, mode
+
+    def build_split_args(self, input_path, segment_pattern):
+        """只复制视频流，由 segment 复用器在关键帧处切分，不解码"""
+        return [self.ffmpeg_binary, '-i', input_path, '-map', '0:v:0', '-c', 'copy',
+                '-f', 'segment', '-segment_time', str(SEGMENT_SECONDS), '-reset_timestamps', '1',
+                segment_pattern, '-y']
+
+    def build_concat_args(self, list_path, output_path):
+        """拼接编码后的片段（直接复制），与整段编码一样只输出视频"""
+        return [self.ffmpeg_binary, '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-map', '0:v:0', '-c:v', 'copy', '-tag:v', 'hvc1',
+                '-movflags', '+faststart', output_path, '-y']
+
+    def process_video_segmented(self, input_path, output_path, on_progress=None, segment_jobs=2, jobs=None):
+        """
+        切分 -> 并行编码 -> 拼接。每个片段使用与整段编码完全相同的滤镜和 x265-params
+        （repeat-headers=1 等），片段的参数集一致，拼接结果 Electra 可以直接播放。
+        同时编码 segment_jobs 个片段，每个片段按 jobs 个并行任务分配 x265 线程（默认 jobs = segment_jobs）。
+        """
+        jobs = jobs or segment_jobs
+        work_dir = tempfile.mkdtemp(prefix=".segments_", dir=os.path.dirname(output_path) or ".")
+        try:
+            returncode, stderr_tail = run_ffmpeg(
+                self.build_split_args(input_path, os.path.join(work_dir, "source_%04d.mkv")))
+            if returncode != 0:
+                return False, stderr_tail
+            sources = sorted(name for name in os.listdir(work_dir) if name.startswith("source_"))
+            if not sources:
+                return False, "切分后没有得到任何片段"
+
+            segment_progress = {}
+
+            def update_segment(index, percent, fps, speed):
+                segment_progress[index] = (percent or 0, fps)
+                if on_progress is not None:
+                    total_percent = sum(p for p, _ in segment_progress.values()) / len(sources)
+                    total_fps = sum(f for _, f in segment_progress.values())
+                    on_progress(total_percent, total_fps, f"{len(sources)} 段")
+
+            encoded = [os.path.join(work_dir, f"encoded_{index:04d}.mp4") for index in range(len(sources))]
+            with ThreadPoolExecutor(max_workers=segment_jobs) as pool:
+                futures = [pool.submit(self.process_video_ffmpeg_python, os.path.join(work_dir, source),
+                                       encoded[index], jobs, partial(update_segment, index))
+                           for index, source in enumerate(sources)]
+                for future in futures:
+                    success, err_msg = future.result()
+                    if not success:
+                        return False, err_msg
+
+            list_path = os.path.join(work_dir, "concat.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.writelines(concat_list_line(path) for path in encoded)
+            returncode, stderr_tail = run_ffmpeg(self.build_concat_args(list_path, output_path))
+            return returncode == 0, (None if returncode == 0 else stderr_tail)
+        except Exception as e:
+            return False, str(e)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def process_video_ffmpeg_python(self, input_path, output_path, jobs=1, on_progress=None):
+        try:
+            cmd_args = self.build_ffmpeg_args(input_path, output_path, jobs)
+            returncode, stderr_tail = run_ffmpeg(cmd_args, on_progress)
+
+            if returncode == 0:
+                return True, None
+            else:
+                # 失败，返回 stderr 尾部
+                return False, stderr_tail
+
+        except ffmpeg.Error as e:
+            # compile 阶段出错
+            return False, str(e)
+        except Exception as e:
+            # subprocess 阶段出错
+            return False, str(e)
+
+    def output_path_for(self, file_path, output_root=None, base_dir=None):
+        """
+        默认输出到源文件同级的 Output 目录；指定 output_root 时按相对 base_dir 的目录结构输出到 output_root 下
+        """
+        directory, filename = os.path.split(file_path)
+        name, ext = os.path.splitext(filename)
+
+        if output_root:
+            relative_dir = os.path.relpath(directory, base_dir) if base_dir is not None else ""
+            output_dir = os.path.normpath(os.path.join(output_root, relative_dir))
+        else:
+            output_dir = os.path.join(directory, OUTPUT_DIR_NAME)
+
+        output_path = os.path.join(output_dir, f"{filename}")
+        if not output_path.lower().endswith(('.mp4', '.mov', '.mkv')):
+            output_path = os.path.join(output_dir, f"{name}.mp4")
+        return output_path
+
+    def run_batch(self, items, jobs=DEFAULT_JOBS, segment_long=False, status=None, on_result=None):
+        """
+        items 为 [(输入路径, 输出路径)]。已是最新的文件直接跳过，其余文件并行处理，
+        输出路径与前面的文件重复时记为失败，不提交任务。
+        每完成一个回调 on_result(已完成数, 总数, 结果)。返回按输入顺序排列的结果列表。
+        """
+        total = len(items)
+        cache = EncodeCache()
+        settings = self.encode_settings()
+        conflicts = find_output_conflicts(items)
+        results = {}
+        done = 0
+
+        pending = []
+        for file_path, output_path in items:
+            if file_path in conflicts:
+                done += 1
+                results[file_path] = make_result(file_path, output_path, 'conflict', False,
+                                                 f"输出文件 {output_path} 与 {conflicts[file_path]} 的输出相同，已跳过")
+                if on_result is not None:
+                    on_result(done, total, results[file_path])
+            elif cache.is_up_to_date(file_path, output_path, settings):
+                done += 1
+                results[file_path] = make_result(file_path, output_path, 'skipped', True)
+                if on_result is not None:
+                    on_result(done, total, results[file_path])
+            else:
+                os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+                pending.append((file_path, output_path))
+
+        status = status or BatchStatus()
+        status.total = len(pending)
+        status.start_time = time.perf_counter()
+        status.running = True
+        # 槽位按请求的并行任务数计算：文件数少于 jobs 时，多出的槽位留给长视频分段编码
+        slots = BatchSlots(max(1, jobs), len(pending))
+        jobs = max(1, min(jobs, len(pending) or 1))
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {}
+                for file_path, output_path in pending:
+                    future = pool.submit(self.timed_process_video, file_path, output_path, jobs,
+                                         partial(status.update, file_path), segment_long, slots)
+                    futures[future] = (file_path, output_path)
+
+                # 按完成顺序回调
+                for future in as_completed(futures):
+                    done += 1
+                    slots.release(1)
+                    file_path, output_path = futures[future]
+                    success, err_msg, mode, seconds = future.result()
+                    status.finish_file(file_path)
+                    if success:
+                        cache.record(file_path, output_path, settings)
+                    results[file_path] = make_result(file_path, output_path, mode, success, err_msg, seconds)
+                    if on_result is not None:
+                        on_result(done, total, results[file_path])
+        finally:
+            status.running = False
+
+        return [results[file_path] for file_path, _ in items]
+
+    def timed_process_video(self, *args):
+        start = time.perf_counter()
+        return self.process_video(*args) + (time.perf_counter() - start,)
+
+
+def last_error_line(err_msg):
+    """只取最后一行关键报错，避免刷屏"""
+    return err_msg.strip().splitlines()[-1] if err_msg and err_msg.strip() else "Unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert videos to Electra-compatible H.265 without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="video files or directories (searched recursively)")
+    parser.add_argument("--output-root", help="write outputs here, mirroring the input tree; with several inputs "
+                                              "each one gets a subfolder named after it "
+                                              "(default: an Output folder next to each video)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="concurrent ffmpeg jobs (default: %(default)s)")
+    parser.add_argument("--profile", choices=sorted(ENCODING_PROFILES), default=DEFAULT_PROFILE,
+                        help="encoding profile (default: %(default)s)")
+    parser.add_argument("--no-segment", action="store_true", help="never split long videos into parallel segments")
+    parser.add_argument("--report", help="write a JSON report to this file (default: stdout)")
+    parser.add_argument("--ffmpeg", help="ffmpeg binary (default: bundled, then PATH)")
+    parser.add_argument("--ffprobe", help="ffprobe binary (default: bundled, then PATH)")
+    args = parser.parse_args(argv)
+
+    videos = discover_videos(args.inputs, [args.output_root] if args.output_root else [])
+    if not videos:
+        print("No video files found.", file=sys.stderr)
+        return 1
+
+    def output_root_for(base_dir):
+        # 多个输入共用 output_root 时各自输出到以输入目录名命名的子目录，A/intro.mp4 和 B/intro.mp4 不会冲突
+        if args.output_root and len(args.inputs) > 1:
+            return os.path.join(args.output_root, os.path.basename(os.path.abspath(base_dir)))
+        return args.output_root
+
+    engine = VideoFormatEngine(args.ffmpeg, args.ffprobe, args.profile)
+    items = [(path, engine.output_path_for(path, output_root_for(base_dir), base_dir)) for path, base_dir in videos]
+    conflicts = find_output_conflicts(items)
+    if conflicts:
+        outputs = dict(items)
+        parser.error("several inputs map to the same output file:\n" +
+                     "\n".join(f"  {other} and {path} -> {outputs[path]}" for path, other in conflicts.items()))
+
+    def on_result(done, total, result):
+        state = "OK  " if result["success"] else "FAIL"
+        line = f"[{done}/{total}] {state} {result['mode']:<8} {result['seconds']:8.1f}s  {result['input']}"
+        if not result["success"]:
+            line += f"\n    {last_error_line(result['error'])}"
+        print(line, file=sys.stderr)
+
+    start = time.perf_counter()
+    results = engine.run_batch(items, args.jobs, not args.no_segment, on_result=on_result)
+    report = build_report(results, time.perf_counter() - start)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fp:
+            fp.write(text)
+    else:
+        print(text)
+
+    print(f"Processed {report['file_count']} files in {report['wall_seconds']:.1f}s "
+          f"({report['skipped_count']} up to date), {report['failed_count']} failed.", file=sys.stderr)
+    return 1 if report["failed_count"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1 @@
-pyinstaller --noconsole --onefile --add-binary "ffmpeg.exe;." .\UnrealElectraH265VideoFormatter.py
\ No newline at end of file
+pyinstaller --noconsole --onefile --add-binary "ffmpeg.exe;." --add-binary "ffprobe.exe;." .\UnrealElectraH265VideoFormatter.py
\ No newline at end of file